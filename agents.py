@@ -1,15 +1,42 @@
 from crewai import Agent
+from config import LOGGING
+from prompt_profiles import persona
 from typing import List
-from crewai_tools import SerperDevTool
 
 def get_researcher(llm, tools: List, topic: str = "") -> Agent:
     """Creates a research specialist agent."""
     return Agent(
-        role="Research Specialist",
-        goal="Analyze trends and provide concise insights",
-        backstory="Expert researcher specializing in trend analysis and clear reporting",
+        **persona("researcher", llm.model),
         tools=tools,
         llm=llm,
         max_iter=2,
-        verbose=True
-    ) 
\ No newline at end of file
+        verbose=LOGGING["verbose"]
+    )
+
+
+def get_research_analyst(llm, tools: List) -> Agent:
+    """Creates the research analyst agent used by the research task."""
+    return Agent(
+        **persona("research_analyst", llm.model),
+        tools=tools,
+        llm=llm,
+        verbose=LOGGING["verbose"]
+    )
+
+
+def get_code_analyst(llm) -> Agent:
+    """Creates the static code analysis agent."""
+    return Agent(
+        **persona("code_analyst", llm.model),
+        llm=llm,
+        verbose=LOGGING["verbose"]
+    )
+
+
+def get_synthesizer(llm) -> Agent:
+    """Creates the agent that merges parallel research findings into one report."""
+    return Agent(
+        **persona("synthesizer", llm.model),
+        llm=llm,
+        verbose=LOGGING["verbose"]
+    )
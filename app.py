@@ -1,11 +1,16 @@
 import streamlit as st
-from crewai import Agent, Task, Crew, Process, LLM
-from crewai_tools import SerperDevTool, CodeInterpreterTool
-from agents import get_researcher
+import jobs
+import batch
+import history
+import report_render
+import time
+import uuid
+import warmup  # CrewAI itself is imported by warmup, off the first-paint path
 import os
+import json
 from dotenv import load_dotenv
-from styles import apply_custom_styles, display_header, display_about, tool_card
-from config import MODELS, TOOLS, TASK_TYPES, OUTPUT_FORMATS
+from styles import apply_custom_styles, display_header, display_about, footer, heading, muted
+from config import MODELS, TOOLS, TASK_TYPES, OUTPUT_FORMATS, WORKER_POOL, BATCH, STARTUP, CODE_OUTPUT_FORMAT, ROUTING, HISTORY, CASSETTE, REPO_ANALYSIS, PROMPT_PROFILES
 
 # Set page config must be the first Streamlit command
 st.set_page_config(
@@ -18,107 +23,61 @@ st.set_page_config(
 # Load environment variables
 load_dotenv()
 
+if STARTUP["preload"] == "eager":
+    warmup.load()
+
+# Identifies this browser session to the job queue, which shares run slots fairly between sessions
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex[:12])
+
 # Apply custom styles
 apply_custom_styles()
 
-# Display header
-st.markdown("""
-    <div style="padding: 2rem 0;">
-        <h1 style="
-            color: #FF6B2B;
-            text-shadow: 
-                0 0 20px rgba(255, 107, 43, 0.9),
-                0 0 40px rgba(255, 107, 43, 0.7),
-                0 0 60px rgba(255, 107, 43, 0.5),
-                0 0 80px rgba(255, 107, 43, 0.3);
-            font-weight: 800;
-            font-size: 4rem;
-            letter-spacing: 2px;
-            margin-bottom: 0.5rem;
-            background: transparent;">CrewAI × Cerebras</h1>
-        <p style="
-            color: #FF8F3F;
-            text-shadow: 
-                0 0 10px rgba(255, 143, 63, 0.8),
-                0 0 20px rgba(255, 143, 63, 0.4);
-            font-size: 1.2rem;
-            letter-spacing: 1px;
-            opacity: 0.9;
-            background: transparent;">Advanced Multi-Agent Research & Analysis Platform</p>
-    </div>
-""", unsafe_allow_html=True)
-
-# Display about section
-st.markdown("""
-    <div class="about-section" style="background: linear-gradient(135deg, rgba(13, 17, 23, 0.95) 0%, rgba(33, 37, 43, 0.90) 100%); border: 1px solid rgba(78, 205, 196, 0.2);">
-        <h2 class="about-title" style="color: #4ECDC4; text-shadow: 0 0 10px rgba(78, 205, 196, 0.3);">
-            About This Project 
-            <span style="font-size: 1.8rem; margin-left: 8px; filter: drop-shadow(0 0 5px rgba(78, 205, 196, 0.5));">🧪</span>
-        </h2>
-        <p class="about-description" style="color: #E0E0E0; text-shadow: 0 0 2px rgba(224, 224, 224, 0.1);">
-            This platform combines the power of CrewAI's multi-agent framework with Cerebras's lightning-fast inference capabilities. 
-            It enables sophisticated AI workflows where multiple agents collaborate to perform complex research and analysis tasks.
-        </p>
-        <div class="features-grid">
-            <div class="feature-card" style="background: linear-gradient(135deg, rgba(33, 37, 43, 0.8) 0%, rgba(43, 47, 53, 0.8) 100%); border: 1px solid rgba(78, 205, 196, 0.15); backdrop-filter: blur(10px);">
-                <div class="feature-icon" style="color: #4ECDC4; font-size: 24px; text-shadow: 0 0 10px rgba(78, 205, 196, 0.5);">🤖</div>
-                <div class="feature-title" style="color: #4ECDC4; font-weight: 600;">Advanced Research Analysis</div>
-                <div class="feature-description" style="color: #B8B8B8;">
-                    Multiple specialized agents working together to deliver comprehensive insights
-                </div>
-            </div>
-            <div class="feature-card" style="background: linear-gradient(135deg, rgba(33, 37, 43, 0.8) 0%, rgba(43, 47, 53, 0.8) 100%); border: 1px solid rgba(78, 205, 196, 0.15); backdrop-filter: blur(10px);">
-                <div class="feature-icon" style="color: #4ECDC4; font-size: 24px; text-shadow: 0 0 10px rgba(78, 205, 196, 0.5);">💻</div>
-                <div class="feature-title" style="color: #4ECDC4; font-weight: 600;">Code Analysis</div>
-                <div class="feature-description" style="color: #B8B8B8;">
-                    Intelligent code interpretation and improvement suggestions
-                </div>
-            </div>
-            <div class="feature-card" style="background: linear-gradient(135deg, rgba(33, 37, 43, 0.8) 0%, rgba(43, 47, 53, 0.8) 100%); border: 1px solid rgba(78, 205, 196, 0.15); backdrop-filter: blur(10px);">
-                <div class="feature-icon" style="color: #4ECDC4; font-size: 24px; text-shadow: 0 0 10px rgba(78, 205, 196, 0.5);">🔍</div>
-                <div class="feature-title" style="color: #4ECDC4; font-weight: 600;">SerperDev Integration</div>
-                <div class="feature-description" style="color: #B8B8B8;">
-                    Powerful web search capabilities for comprehensive research
-                </div>
-            </div>
-            <div class="feature-card" style="background: linear-gradient(135deg, rgba(33, 37, 43, 0.8) 0%, rgba(43, 47, 53, 0.8) 100%); border: 1px solid rgba(78, 205, 196, 0.15); backdrop-filter: blur(10px);">
-                <div class="feature-icon" style="color: #4ECDC4; font-size: 24px; text-shadow: 0 0 10px rgba(78, 205, 196, 0.5);">⚡</div>
-                <div class="feature-title" style="color: #4ECDC4; font-weight: 600;">Cerebras Powered</div>
-                <div class="feature-description" style="color: #B8B8B8;">
-                    State-of-the-art language models for superior performance
-                </div>
-            </div>
-        </div>
-    </div>
-""", unsafe_allow_html=True)
+# Display header and about section
+display_header()
+display_about()
 
 # Sidebar configuration
 with st.sidebar:
-    st.markdown("""
-        <div style='text-align: center; margin-bottom: 1.5rem;'>
-            <h2 style='color: #4ECDC4; font-size: 2.2rem; font-weight: 600; text-shadow: 0 0 10px rgba(78, 205, 196, 0.3);'>Configuration</h2>
-        </div>
-    """, unsafe_allow_html=True)
+    heading("Configuration", css_class="sidebar-title")
 
     # Model selection with icons and descriptions
-    st.markdown("<h3 style='color: #FF6B6B;'>🤖 Model Selection</h3>", unsafe_allow_html=True)
+    heading("🤖 Model Selection", level=3, css_class="sidebar-heading")
     model_name = st.selectbox(
         "Choose your model",
         options=list(MODELS.keys()),
         format_func=lambda x: f"{MODELS[x]['icon']} {MODELS[x]['name']}",
         help="Select the model to use for research"
     )
-    st.markdown(f"<p style='font-size: 0.9em; color: #B8B8B8;'>{MODELS[model_name]['description']}</p>", unsafe_allow_html=True)
+    muted(MODELS[model_name]['description'])
+    # Connect to the API ahead of the first run, and again after a model switch in case the connection went idle
+    if st.session_state.get("warmed_for_model") != model_name:
+        st.session_state.warmed_for_model = model_name
+        warmup.warm_connections()
+    routing_mode = st.selectbox(
+        "Routing",
+        options=list(ROUTING["modes"].keys()),
+        index=list(ROUTING["modes"]).index(ROUTING["default_mode"]),
+        format_func=lambda x: f"{ROUTING['modes'][x]['icon']} {ROUTING['modes'][x]['name']}",
+        help="Fall back to or race other Cerebras models when the selected one is slow or rate limited"
+    )
+    muted(ROUTING["modes"][routing_mode]["description"])
+    stream_output = st.toggle(
+        "📡 Stream output",
+        value=True,
+        help="Show the final answer token by token as the model writes it"
+    )
 
     # Task Type Selection
-    st.markdown("<h3 style='color: #FF6B6B; margin-top: 2rem;'>🎯 Task Type</h3>", unsafe_allow_html=True)
+    heading("🎯 Task Type", level=3, css_class="sidebar-heading")
     task_type = st.radio(
         "Select your task",
         options=list(TASK_TYPES.keys()),
         format_func=lambda x: f"{TASK_TYPES[x]['icon']} {TASK_TYPES[x]['name']}",
-        help="Choose between research analysis or code interpretation"
+        help="Choose between research analysis (single agent or parallel sub-research), code interpretation of a snippet or a whole repository, or a batch of research goals"
     )
     is_code_task = task_type == "code"
+    is_repo_task = task_type == "repo"
+    is_batch_task = task_type == "batch"
 
 # Get and validate API keys
 try:
@@ -128,22 +87,11 @@ except KeyError:
     st.info("Please add CEREBRAS_API_KEY to your .env file.")
     st.stop()
 
-# Configure LLM
-llm = LLM(
-    model=model_name,
-    api_key=cerebras_api_key,
-    base_url="https://api.cerebras.ai/v1",
-    temperature=0.5
-)
-
-# Initialize tools
-tools = []
-
 # Tool selection (only for research task)
-selected_tools = []
-if not is_code_task:
+selected_tool_ids = []
+if not is_code_task and not is_repo_task:
     with st.sidebar:
-        st.markdown("<h3 style='color: #FF6B6B; margin-top: 2rem;'>🛠️ Tools</h3>", unsafe_allow_html=True)
+        heading("🛠️ Tools", level=3, css_class="sidebar-heading")
         
         for tool_id, tool_config in TOOLS.items():
             use_tool = st.checkbox(
@@ -153,25 +101,106 @@ if not is_code_task:
             )
             
             if use_tool:
-                if tool_id == "serper":
-                    try:
-                        serper_api_key = os.environ["SERPER_API_KEY"]
-                        selected_tools.append(SerperDevTool(api_key=serper_api_key))
-                    except KeyError:
-                        st.warning("⚠️ SerperDev API key missing")
+                if os.environ.get(tool_config["api_key_env"]):
+                    selected_tool_ids.append(tool_id)
+                else:
+                    st.warning("⚠️ SerperDev API key missing")
+
+with st.sidebar:
+    if CASSETTE["mode"] == "record":
+        muted(f"📼 Recording LLM and search traffic to {CASSETTE['path']}")
+    elif CASSETTE["mode"] == "replay":
+        muted(f"📼 Replaying LLM and search traffic from {CASSETTE['path']} ({CASSETTE['speed']} speed)")
+    bypass_cache = st.toggle(
+        "♻️ Bypass cache",
+        value=False,
+        help="Always run the crew, even if an identical request was answered recently"
+    )
+
+
+def open_run(run_id):
+    """Re-displays a recorded run as a finished job, without rerunning the crew."""
+    run = history.get_history().get(run_id)
+    if run is None:
+        return
+    job = jobs.completed(run["result"], {**run["metadata"], "replayed_from": {"id": run["id"], "created_at": run["created_at"]}})
+    st.session_state.job_id = job.id
+    st.query_params["job"] = job.id
+    st.rerun()
+
+
+@st.fragment
+def show_history():
+    """Searchable list of earlier runs, loaded a page at a time."""
+    query = st.text_input("Search history", key="history_query", placeholder="Words from the goal or report")
+    if st.session_state.get("history_last_query") != query:
+        st.session_state.history_last_query = query
+        st.session_state.history_limit = HISTORY["page_size"]
+    limit = st.session_state.setdefault("history_limit", HISTORY["page_size"])
+
+    runs, has_more = history.get_history().page(query, limit=limit)
+    if not runs:
+        muted("No matching runs." if query else "No runs yet.")
+    for run in runs:
+        preview = " ".join(run["goal"].split())[:HISTORY["preview_chars"]]
+        when = time.strftime("%b %d %H:%M", time.localtime(run["created_at"]))
+        icon = TASK_TYPES.get(run["task_type"], TASK_TYPES["research"])["icon"]
+        if st.button(f"{icon} {preview} · {when}", key=f"history-{run['id']}", help=MODELS.get(run["model"], {}).get("name"), use_container_width=True):
+            open_run(run["id"])
+    if has_more and st.button("Load more", key="history-more"):
+        st.session_state.history_limit += HISTORY["page_size"]
+        st.rerun(scope="fragment")
+
+
+with st.sidebar:
+    with st.expander("🕘 Run history"):
+        show_history()
 
 # Main content area
 if is_code_task:
-    st.markdown(f"<h2 style='color: #4ECDC4; margin-top: 2rem;'>{TASK_TYPES['code']['icon']} Code Analysis</h2>", unsafe_allow_html=True)
+    heading(f"{TASK_TYPES['code']['icon']} Code Analysis")
     research_goal = st.text_area(
         "Enter your code",
         value="def example(x, y):\n    return x + y",
         height=200,
         help="Enter the Python code you want to analyze"
     )
-    output_format = "Code Analysis"
+    output_format = CODE_OUTPUT_FORMAT
+elif is_repo_task:
+    heading(f"{TASK_TYPES['repo']['icon']} Repository Analysis")
+    sources = ["Upload a zip"] + (["Local directory"] if REPO_ANALYSIS["allow_local_paths"] else [])
+    repo_source = st.radio("Source", sources, horizontal=True)
+    if repo_source == "Upload a zip":
+        repo_zip = st.file_uploader("Upload the project", type=["zip"], help="Every .py file in the archive is analyzed")
+        research_goal = repo_zip.name if repo_zip else ""
+    else:
+        research_goal = st.text_input("Project directory", placeholder="/path/to/project", help="Path on the machine running the app").strip()
+    muted("Files analyzed before with the same content and model reuse their earlier review; only changed files are sent to the model.")
+    output_format = CODE_OUTPUT_FORMAT
+elif is_batch_task:
+    heading(f"{TASK_TYPES['batch']['icon']} Batch Research")
+    goals_file = st.file_uploader(
+        "Upload research goals",
+        type=["csv", "jsonl", "ndjson"],
+        help="One goal per row in a 'goal' column/field, with optional 'model' and 'output_format'"
+    )
+    research_goal = goals_file.name if goals_file else ""
+
+    output_format = st.selectbox(
+        "Default Output Format",
+        options=list(OUTPUT_FORMATS.keys()),
+        format_func=lambda x: f"{OUTPUT_FORMATS[x]['icon']} {OUTPUT_FORMATS[x]['name']}",
+        help="Used for rows that do not specify an output_format"
+    )
+    batch_concurrency = st.slider(
+        "Concurrent runs",
+        min_value=1,
+        max_value=BATCH["max_concurrency"],
+        value=BATCH["default_concurrency"],
+        help="How many goals run against Cerebras at the same time"
+    )
 else:
-    st.markdown(f"<h2 style='color: #4ECDC4; margin-top: 2rem;'>{TASK_TYPES['research']['icon']} Research Configuration</h2>", unsafe_allow_html=True)
+    heading(f"{TASK_TYPES[task_type]['icon']} Research Configuration")
     research_goal = st.text_area(
         "Research Goal",
         value="Analyze recent developments and key trends.",
@@ -186,162 +215,358 @@ else:
         format_func=lambda x: f"{OUTPUT_FORMATS[x]['icon']} {OUTPUT_FORMATS[x]['name']}",
         help="Choose how you want the research to be presented"
     )
-    st.markdown(f"<p style='font-size: 0.9em; color: #B8B8B8;'>{OUTPUT_FORMATS[output_format]['description']}</p>", unsafe_allow_html=True)
+    muted(OUTPUT_FORMATS[output_format]['description'])
+
 
-# Run button with loading animation
-if st.button("🚀 " + ("Analyze Code" if is_code_task else "Start Research"), type="primary"):
+def results_title(metadata):
+    """Returns the icon and name heading for a result of this task type and format."""
+    if metadata.get("task_type") in ("code", "repo"):
+        task = TASK_TYPES[metadata["task_type"]]
+        return f"{task['icon']} {task['name']}"
+    result_format = OUTPUT_FORMATS[metadata.get("output_format")]
+    return f"{result_format['icon']} {result_format['name']}"
+
+
+# Run button: submits the crew to the worker pool (or answers from cache)
+start_label = "Analyze Code" if is_code_task else "Analyze Repository" if is_repo_task else "Start Batch" if is_batch_task else "Start Research"
+if st.button("🚀 " + start_label, type="primary"):
     if not research_goal:
-        st.error("Please provide the " + ("code" if is_code_task else "research goal") + ".")
+        missing = "code" if is_code_task else "project" if is_repo_task else "goals file" if is_batch_task else "research goal"
+        st.error(f"Please provide the {missing}.")
         st.stop()
-        
-    with st.spinner("🔄 " + ("Analyzing code..." if is_code_task else "Conducting research...")):
+
+    if is_batch_task:
+        try:
+            batch_items = batch.parse_goals(goals_file.getvalue(), goals_file.name, model_name, output_format)
+        except ValueError as e:
+            st.error(f"❌ Could not read the goals file: {e}")
+            st.stop()
+
+    with st.spinner("Loading CrewAI..."):
+        crews = warmup.load()
+
+    if is_repo_task:
+        import repo_analysis  # Loaded with CrewAI by warmup.load()
+
         try:
-            if is_code_task:
-                # Code analysis setup - static analysis only
-                code_analyst = Agent(
-                    role="Python Code Analyst",
-                    goal="Analyze Python code for quality, structure, and best practices",
-                    backstory="Expert Python developer specializing in code analysis, optimization, and best practices",
-                    llm=LLM(
-                        model=model_name,
-                        api_key=cerebras_api_key,
-                        base_url="https://api.cerebras.ai/v1",
-                        temperature=0.5
-                    ),
-                    verbose=True
-                )
-                
-                analysis_task = Task(
-                    description=f"Analyze this Python code:\n{research_goal}",
-                    expected_output="Analysis report with code quality assessment and recommendations",
-                    agent=code_analyst
-                )
+            if repo_source == "Upload a zip":
+                repo_files = repo_analysis.collect_from_zip(repo_zip.getvalue())
             else:
-                # Research setup
-                researcher = Agent(
-                    role="Research Analyst",
-                    goal="Conduct comprehensive research and analysis on emerging trends and developments",
-                    backstory="""Expert research analyst with deep expertise in analyzing market trends, technological developments, and industry patterns. 
-                    Skilled at synthesizing complex information from multiple sources to provide actionable insights.""",
-                    tools=selected_tools,
-                    llm=LLM(
-                        model=model_name,
-                        api_key=cerebras_api_key,
-                        base_url="https://api.cerebras.ai/v1",
-                        temperature=0.5
-                    ),
-                    verbose=True
-                )
-
-                research_task = Task(
-                    description=research_goal,
-                    expected_output=f"{OUTPUT_FORMATS[output_format]['name']}",
-                    agent=researcher
-                )
-
-            # Simplified crew setup
-            crew = Crew(
-                agents=[code_analyst if is_code_task else researcher],
-                tasks=[analysis_task if is_code_task else research_task],
-                process=Process.sequential,
-                verbose=True
+                repo_files = repo_analysis.collect_from_directory(research_goal)
+        except ValueError as e:
+            st.error(f"❌ Could not read the project: {e}")
+            st.stop()
+        if not repo_files:
+            st.error("❌ No Python files found in the project.")
+            st.stop()
+
+    try:
+        if is_repo_task:
+            job = crews.submit_repo(
+                research_goal,
+                repo_files,
+                model_name,
+                cerebras_api_key,
+                use_cache=not bypass_cache,
+                routing=routing_mode,
+                owner=session_id
             )
-            
-            # Progress tracking with custom styling
-            col1, col2, col3 = st.columns([1,2,1])
-            with col2:
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-            for i in range(4):
-                progress_bar.progress((i + 1) * 25)
-                status_text.markdown(f"<div style='text-align: center; color: #4ECDC4;'>Phase {i+1}/4: {['Initializing', 'Research', 'Analysis', 'Finalizing'][i]}</div>", unsafe_allow_html=True)
-                
-            # Get results
-            result = crew.kickoff()
-            
-            # Clear progress indicators
-            progress_bar.empty()
-            status_text.empty()
-            
-            # Display results in a styled container
-            st.success("✨ " + ("Analysis completed!" if is_code_task else "Research completed!"))
-            
-            # Custom styling for the results container
-            st.markdown("""
-            <style>
-            .results-container {
-                background: linear-gradient(135deg, rgba(13, 17, 23, 0.95) 0%, rgba(33, 37, 43, 0.90) 100%);
-                border: 1px solid rgba(78, 205, 196, 0.2);
-                border-radius: 10px;
-                padding: 2rem;
-                margin: 1rem 0;
-            }
-            .results-title {
-                color: #4ECDC4;
-                font-size: 2rem;
-                font-weight: 600;
-                margin-bottom: 1.5rem;
-                text-shadow: 0 0 10px rgba(78, 205, 196, 0.3);
-            }
-            .results-content {
-                color: #E0E0E0;
-                font-size: 1.1rem;
-                line-height: 1.6;
-            }
-            .results-content h1, .results-content h2, .results-content h3 {
-                color: #FF6B6B;
-                margin-top: 1.5rem;
-                margin-bottom: 1rem;
-                text-shadow: 0 0 10px rgba(255, 107, 107, 0.3);
-            }
-            .results-content ul {
-                list-style-type: none;
-                padding-left: 0;
-            }
-            .results-content li {
-                margin: 1rem 0;
-                padding: 1rem;
-                background: linear-gradient(135deg, rgba(33, 37, 43, 0.8) 0%, rgba(43, 47, 53, 0.8) 100%);
-                border: 1px solid rgba(78, 205, 196, 0.15);
-                border-radius: 8px;
-                transition: all 0.3s ease;
-            }
-            .results-content li:hover {
-                transform: translateX(5px);
-                border-color: rgba(78, 205, 196, 0.3);
-                box-shadow: 0 0 15px rgba(78, 205, 196, 0.1);
-            }
-            .results-content strong {
-                color: #FF8F3F;
-                font-weight: 600;
-            }
-            </style>
-            """, unsafe_allow_html=True)
-
-            # Display results with custom styling
-            st.markdown(f"""
-            <div class="results-container">
-                <div class="results-title">
-                    {TASK_TYPES['code']['icon'] if is_code_task else OUTPUT_FORMATS[output_format]['icon']} 
-                    {TASK_TYPES['code']['name'] if is_code_task else OUTPUT_FORMATS[output_format]['name']}
-                </div>
-                <div class="results-content">
-                    {result}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Footer
-            st.markdown("""
-            <div style="text-align: center; margin-top: 2rem; padding: 1rem; color: #4ECDC4; font-size: 0.9rem;">
-                Powered by CrewAI and Cerebras 🚀
-            </div>
-            """, unsafe_allow_html=True)
-            
-        except Exception as e:
-            st.error(f"❌ An error occurred: {str(e)}")
-            if "API key" in str(e):
-                st.info("🔑 Please check your API key configuration.")
-            else:
-                st.info("💡 Try narrowing the scope or selecting a briefer output format.") 
\ No newline at end of file
+        elif is_batch_task:
+            job = crews.submit_batch(
+                batch_items,
+                batch_concurrency,
+                model_name,
+                output_format,
+                selected_tool_ids,
+                cerebras_api_key,
+                use_cache=not bypass_cache,
+                owner=session_id
+            )
+        else:
+            job = crews.submit_request(
+                task_type,
+                research_goal,
+                model_name,
+                output_format,
+                selected_tool_ids,
+                cerebras_api_key,
+                use_cache=not bypass_cache,
+                stream=stream_output,
+                routing=routing_mode,
+                owner=session_id
+            )
+    except jobs.QueueFullError as e:
+        st.warning(f"⏳ {e}")
+        st.stop()
+
+    # Keep the job id in the URL too, so a reopened tab can pick the run back up
+    st.session_state.job_id = job.id
+    st.query_params["job"] = job.id
+
+
+@st.fragment(run_every=WORKER_POOL["poll_seconds"])
+def show_job_progress(job_id):
+    """Polls a running job and redraws only the progress widgets."""
+    job = jobs.get_job(job_id)
+    if job is None or job.done:
+        st.rerun()
+
+    col1, col2, col3 = st.columns([1,2,1])
+    with col2:
+        st.progress(job.progress)
+        position = jobs.queue_position(job) if job.status == jobs.QUEUED else None
+        if job.cancel_reason:
+            muted("Cancelling...", css_class="status-line")
+        elif position:
+            muted(f"Waiting for a free slot: position {position} in the queue", css_class="status-line")
+        else:
+            muted(job.phase, css_class="status-line")
+    with col3:
+        if st.button("⏹️ Cancel", key=f"cancel-{job_id}", disabled=bool(job.cancel_reason)):
+            jobs.cancel(job)
+            st.rerun()
+
+
+@st.fragment(run_every=WORKER_POOL["poll_seconds"])
+def show_streamed_answer(job_id):
+    """Polls a streaming job and redraws only the answer text."""
+    job = jobs.get_job(job_id)
+    if job is None:
+        return
+    st.markdown(job.streamed_answer or "_Agents are working, the answer will appear here as it is written..._")
+
+
+def show_batch_table(job):
+    """Renders the status of every finished batch row (without the reports, which can be large)."""
+    rows = sorted(job.metadata.get("results", []), key=lambda r: r["row"])
+    muted(f"{len(rows)}/{job.metadata.get('rows', len(rows))} goals finished")
+    if rows:
+        st.dataframe(
+            [{k: row[k] for k in ("row", "goal", "model", "output_format", "status", "elapsed_seconds")} for row in rows],
+            hide_index=True,
+            use_container_width=True
+        )
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def batch_downloads(results_path, size):
+    """CSV and JSONL exports of a batch's results file; size keys the cache to the rows written so far."""
+    rows = batch.read_results(results_path)
+    return batch.to_csv(rows), batch.to_jsonl(rows)
+
+
+def show_batch_downloads(job):
+    """Download buttons for a batch's results, read from its results file once per new row."""
+    results_path = job.metadata.get("results_path")
+    if not results_path or not os.path.exists(results_path):
+        return
+    as_csv, as_jsonl = batch_downloads(results_path, os.path.getsize(results_path))
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("⬇️ Download CSV", as_csv, file_name=f"batch-{job.id}.csv", mime="text/csv")
+    with col2:
+        st.download_button("⬇️ Download JSONL", as_jsonl, file_name=f"batch-{job.id}.jsonl", mime="application/jsonl")
+
+
+@st.fragment(run_every=WORKER_POOL["poll_seconds"])
+def show_batch_progress(job_id):
+    """Polls a running batch and redraws its finished rows (the downloads are drawn outside, per page run)."""
+    job = jobs.get_job(job_id)
+    if job is not None:
+        show_batch_table(job)
+
+
+def show_performance(job):
+    """Renders the collapsible timing and token breakdown of a finished run."""
+    metadata = job.metadata
+    timings = metadata.get("timings")
+    if not timings and metadata.get("elapsed_seconds") is None:
+        return
+
+    with st.expander("⏱️ Performance breakdown"):
+        if metadata.get("cached"):
+            st.caption("Served from cache; figures are from the original run.")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Wall time", f"{metadata.get('elapsed_seconds', 0):.2f}s")
+        col2.metric("Tokens", metadata.get("total_tokens") or "n/a")
+        if timings:
+            col3.metric("LLM time", f"{timings['llm']['seconds']:.2f}s", f"{timings['llm']['count']} calls", delta_color="off")
+            col4.metric("Tool time", f"{timings['tool']['seconds']:.2f}s", f"{timings['tool']['count']} calls", delta_color="off")
+        if metadata.get("prompt_tokens") is not None:
+            st.caption(
+                f"Prompt tokens: {metadata['prompt_tokens']} · Completion tokens: {metadata.get('completion_tokens')} · "
+                f"LLM requests: {metadata.get('llm_requests')}"
+            )
+
+        llm_timings = (timings or {}).get("llm", {})
+        if llm_timings.get("full_profile_input_tokens"):
+            st.caption(
+                f"Prompt profile: {PROMPT_PROFILES[metadata.get('prompt_profile', 'full')]['name']} · ≈{llm_timings['input_tokens']} input tokens "
+                f"(≈{llm_timings['full_profile_input_tokens']} with the full profile) · "
+                f"{llm_timings['prefixes']} distinct system prefixes across {llm_timings['count']} calls"
+            )
+
+        if metadata.get("connections"):
+            connections = metadata["connections"]
+            st.caption(
+                f"HTTP requests: {connections['requests']} · {connections['requests'] - connections['new_connections']} on reused "
+                f"connections, {connections['new_connections']} new ({connections['connect_seconds']:.2f}s connecting) · "
+                f"{connections['http2']} over HTTP/2"
+            )
+
+        if metadata.get("models_used"):
+            used = ", ".join(f"{MODELS[m]['name']} × {n}" for m, n in metadata["models_used"].items())
+            st.caption(f"Routing ({metadata.get('routing')}): {used} · {metadata.get('failovers', 0)} failovers")
+
+        if metadata.get("evidence"):
+            evidence = metadata["evidence"]
+            st.caption(
+                f"Search evidence: {evidence['raw_tokens']} tokens from {evidence['searches']} searches compressed to "
+                f"{evidence['kept_tokens']} (≈{evidence['saved_tokens']} saved, {evidence['duplicates']} duplicate results dropped)."
+            )
+
+        if metadata.get("seeded_from"):
+            seeded = metadata["seeded_from"]
+            st.caption(f"Started from the report for \"{seeded['goal']}\" (similarity {seeded['score']:.2f}).")
+
+        if metadata.get("subquestions"):
+            st.caption("Researched in parallel: " + " · ".join(metadata["subquestions"]))
+
+        chunks = metadata.get("code_chunks")
+        if chunks and chunks["total"]:
+            st.caption(f"Code reviewed in {chunks['total']} chunks; {chunks['reused']} unchanged chunk reviews reused from cache.")
+
+        repo = metadata.get("repo")
+        if repo:
+            st.caption(
+                f"{repo['files']} Python files: {repo['reviewed']} reviewed by the model, {repo['reused']} reused or too small. "
+                f"Since the last analysis of this project: {repo['added']} added, {repo['changed']} changed, {repo['removed']} removed."
+            )
+
+        if job.trace is not None:
+            st.dataframe(job.trace.rows(), hide_index=True, use_container_width=True)
+            st.caption("Per-call token counts are estimates (≈4 characters per token); totals above come from CrewAI.")
+            st.download_button(
+                "⬇️ Download trace (OTLP JSON)",
+                json.dumps(job.trace.to_otel(), indent=2),
+                file_name=f"trace-{job.id}.json",
+                mime="application/json"
+            )
+
+
+@st.fragment
+def show_report_page(job_id):
+    """Shows one page of a finished report; turning the page redraws only this fragment."""
+    job = jobs.get_job(job_id)
+    if job is None:
+        return
+    report = report_render.get_report(job.id, job.result)
+    page = 0
+    if len(report.pages) > 1:
+        page = st.selectbox(
+            "Page",
+            options=range(len(report.pages)),
+            format_func=lambda i: f"Page {i + 1} of {len(report.pages)} · {report.titles[i]}",
+            key=f"report-page-{job_id}",
+            label_visibility="collapsed"
+        )
+    # Already rendered and sanitized by report_render; st.html inserts it as-is, whereas st.markdown
+    # would parse it as Markdown again after the first blank line (e.g. inside a code block)
+    st.html(f'<div class="results-content">{report.page_html(page)}</div>')
+
+
+@st.fragment
+def show_exports(job_id):
+    """Markdown download, and a PDF that is rendered in the background when first asked for."""
+    job = jobs.get_job(job_id)
+    if job is None:
+        return
+    report = report_render.get_report(job.id, job.result)
+    col1, col2 = st.columns(2)
+    col1.download_button("⬇️ Download Markdown", report.markdown, file_name=f"report-{job_id}.md", mime="text/markdown")
+    with col2:
+        pdf = report.pdf_export
+        if pdf is None:
+            if st.button("📄 Prepare PDF", key=f"pdf-{job_id}"):
+                report.start_pdf()
+                st.rerun(scope="fragment")
+        elif not pdf.done():
+            muted("Preparing PDF...")
+            time.sleep(WORKER_POOL["poll_seconds"])
+            st.rerun(scope="fragment")
+        elif pdf.exception() is not None:
+            muted(f"PDF export failed: {pdf.exception()}")
+        else:
+            st.download_button("⬇️ Download PDF", pdf.result(), file_name=f"report-{job_id}.pdf", mime="application/pdf")
+
+
+def show_results(job):
+    """Renders the result of a finished job in the styled results container."""
+    is_code_result = job.metadata.get("task_type") in ("code", "repo")
+
+    # Display results in a styled container
+    st.success("✨ " + ("Analysis completed!" if is_code_result else "Research completed!"))
+    if job.metadata.get("replayed_from"):
+        recorded = time.strftime("%Y-%m-%d %H:%M", time.localtime(job.metadata["replayed_from"]["created_at"]))
+        st.caption(f"🕘 Re-displayed from the run history (recorded {recorded}); nothing was rerun.")
+    elif job.metadata.get("semantic_match"):
+        match = job.metadata["semantic_match"]
+        st.caption(
+            f"⚡ Served from the cached report for a similar goal, \"{match['goal']}\" (similarity {match['score']:.2f}). "
+            "Toggle \"Bypass cache\" in the sidebar to rerun."
+        )
+    elif job.metadata.get("cached"):
+        st.caption("⚡ Served from cache, no tokens spent. Toggle \"Bypass cache\" in the sidebar to rerun.")
+    if job.metadata.get("truncated"):
+        st.caption("✂️ This report is very long, so only its beginning is shown; the full text is in the run history.")
+
+    # Display results in the themed container
+    with st.container(key="results-container"):
+        heading(results_title(job.metadata), css_class="results-title")
+        show_report_page(job.id)
+    show_exports(job.id)
+
+    show_performance(job)
+
+    footer()
+
+
+# Show the current job: live progress while running, results once finished
+current_job = jobs.get_job(st.session_state.get("job_id") or st.query_params.get("job"))
+if current_job is not None:
+    st.session_state.job_id = current_job.id
+    if not current_job.done:
+        show_job_progress(current_job.id)
+        if current_job.metadata.get("task_type") == "batch":
+            show_batch_progress(current_job.id)
+            # Outside the polling fragment, so the exports are only rebuilt when the page reruns;
+            # clicking the button reruns it
+            st.button("🔄 Update downloads")
+            show_batch_downloads(current_job)
+        elif current_job.metadata.get("stream"):
+            # The frame is drawn once; only the text fragment updates
+            with st.container(key="results-container"):
+                heading(results_title(current_job.metadata), css_class="results-title")
+                show_streamed_answer(current_job.id)
+    elif current_job.status == jobs.DONE and current_job.metadata.get("task_type") == "batch":
+        st.success(f"✨ Batch completed: {current_job.result}")
+        show_batch_table(current_job)
+        show_batch_downloads(current_job)
+    elif current_job.status == jobs.DONE:
+        show_results(current_job)
+    elif current_job.status == jobs.CANCELLED:
+        st.warning(f"⏹️ {current_job.error}.")
+        if current_job.tokens_used:
+            st.caption(f"About {current_job.tokens_used} tokens were used before the run stopped.")
+        if current_job.metadata.get("task_type") == "batch":
+            show_batch_downloads(current_job)
+    else:
+        st.error(f"❌ An error occurred: {current_job.error}")
+        if "API key" in current_job.error:
+            st.info("🔑 Please check your API key configuration.")
+        else:
+            st.info("💡 Try narrowing the scope or selecting a briefer output format.")
+
+# Warm the CrewAI imports now that the page is drawn, so the first run does not pay for them
+if STARTUP["preload"] == "background":
+    warmup.start_background()
@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List
+
+from config import BATCH, MODELS, OUTPUT_FORMATS
+
+RESULT_FIELDS = ["row", "goal", "model", "output_format", "status", "elapsed_seconds", "result", "error"]
+
+
+def parse_goals(data: bytes, filename: str, default_model: str, default_format: str) -> List[Dict]:
+    """Parses an uploaded CSV or JSONL file of research goals.
+
+    Each row needs a ``goal``; ``model`` and ``output_format`` are optional
+    and fall back to the given defaults. Raises ValueError on bad rows.
+    """
+    text = data.decode("utf-8-sig")
+    if filename.lower().endswith((".jsonl", ".ndjson")):
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        records = list(csv.DictReader(io.StringIO(text)))
+
+    items = []
+    for row, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            raise ValueError(f"Row {row}: expected an object with a 'goal' field")
+        goal = (record.get("goal") or "").strip()
+        if not goal:
+            raise ValueError(f"Row {row}: missing 'goal'")
+        model = (record.get("model") or "").strip() or default_model
+        if model not in MODELS:
+            raise ValueError(f"Row {row}: unknown model '{model}'")
+        output_format = (record.get("output_format") or "").strip() or default_format
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Row {row}: unknown output format '{output_format}'")
+        items.append({"row": row, "goal": goal, "model": model, "output_format": output_format})
+
+    if len(items) > BATCH["max_rows"]:
+        raise ValueError(f"Batch has {len(items)} goals; the limit is {BATCH['max_rows']}")
+    return items
+
+
+class RunRateLimiter:
+    """Spaces out run starts so each model stays under its runs-per-minute limit."""
+
+    def __init__(self, runs_per_minute: Dict[str, float]):
+        self.runs_per_minute = runs_per_minute
+        self._lock = threading.Lock()
+        self._next_start: Dict[str, float] = {}
+
+    def acquire(self, model_name: str) -> None:
+        """Blocks until a run on model_name may start."""
+        rate = self.runs_per_minute.get(model_name)
+        if not rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(model_name, now))
+            self._next_start[model_name] = start + 60.0 / rate
+        if start > now:
+            time.sleep(start - now)
+
+
+def run_batch(job, items: List[Dict], run_item: Callable[[Dict], str], concurrency: int, results_path: str) -> str:
+    """Runs run_item for every goal with bounded concurrency.
+
+    Finished rows are appended to the JSONL file at results_path as they
+    complete, so partial results can be downloaded while the batch is still
+    running. job.metadata["results"] gets the same rows without their
+    report text, for progress displays.
+    """
+    limiter = RunRateLimiter(BATCH["runs_per_minute"])
+    results = job.metadata.setdefault("results", [])
+    job.metadata["results_path"] = results_path
+    job.total_tasks = len(items)
+    os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+
+    def execute(item: Dict) -> Dict:
+        # Raises once the batch is cancelled, so queued rows do not start
+        job.check()
+        limiter.acquire(item["model"])
+        started_at = time.perf_counter()
+        row = dict(item)
+        try:
+            row.update(status="done", result=run_item(item), error="")
+        except Exception as e:
+            row.update(status="failed", result="", error=str(e))
+        row["elapsed_seconds"] = round(time.perf_counter() - started_at, 3)
+        return row
+
+    concurrency = max(1, min(concurrency, BATCH["max_concurrency"]))
+    with open(results_path, "a", encoding="utf-8") as results_file:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-run") as pool:
+            for future in as_completed([pool.submit(execute, item) for item in items]):
+                row = future.result()
+                results.append({k: v for k, v in row.items() if k != "result"})
+                results_file.write(json.dumps(row, ensure_ascii=False) + "\n")
+                results_file.flush()
+                job.on_task_done(row)
+
+    failed = sum(1 for row in results if row["status"] == "failed")
+    return f"{len(results) - failed}/{len(results)} goals completed"
+
+
+def read_results(results_path: str) -> List[Dict]:
+    """Full result rows of a batch, as written so far to its JSONL file."""
+    if not os.path.exists(results_path):
+        return []
+    with open(results_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def to_csv(rows: List[Dict]) -> str:
+    """Formats batch result rows as CSV, ordered by input row."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(sorted(rows, key=lambda r: r["row"]))
+    return buffer.getvalue()
+
+
+def to_jsonl(rows: List[Dict]) -> str:
+    """Formats batch result rows as JSON lines, ordered by input row."""
+    return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in sorted(rows, key=lambda r: r["row"]))
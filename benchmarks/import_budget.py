@@ -0,0 +1,77 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+from config import STARTUP
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+_PROBE = """
+import json, sys, time
+started_at = time.perf_counter()
+for name in sys.argv[2:]:
+    __import__(name)
+elapsed = time.perf_counter() - started_at
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in json.loads(sys.argv[1]) if m in sys.modules]}))
+"""
+
+
+def startup_imports(path: str = APP_PATH) -> List[str]:
+    """Top-level modules app.py imports before drawing anything."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+    return list(dict.fromkeys(names))
+
+
+def measure(modules: List[str], deferred: List[str]) -> Dict:
+    """Imports the modules in a fresh interpreter and reports the time taken and deferred modules pulled in."""
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, json.dumps(deferred), *modules],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check app.py's start-up imports against the import-time budget")
+    parser.add_argument("--budget", type=float, default=STARTUP["import_budget_seconds"], help="Seconds allowed")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters to measure; the fastest counts")
+    parser.add_argument("--deferred", action="store_true", help="Also report the cost of the deferred CrewAI imports")
+    args = parser.parse_args(argv)
+
+    modules = startup_imports()
+    deferred = STARTUP["deferred_modules"]
+    runs = [measure(modules, deferred) for _ in range(args.repeats)]
+    seconds = min(run["seconds"] for run in runs)
+    loaded = runs[0]["loaded"]
+    report = {"modules": modules, "seconds": round(seconds, 3), "budget": args.budget, "deferred_loaded": loaded}
+    if args.deferred:
+        report["deferred_seconds"] = round(measure(["warmup", "crews", "streaming"], [])["seconds"], 3)
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if seconds > args.budget:
+        failures.append(f"start-up imports took {seconds:.2f}s, over the {args.budget:.2f}s budget")
+    if loaded:
+        failures.append(f"start-up imports pulled in deferred modules: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
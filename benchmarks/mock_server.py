@@ -0,0 +1,185 @@
+import argparse
+import itertools
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+FINAL_ANSWER = (
+    "Thought: I now can give a great answer\n"
+    "Final Answer: ## Summary\n"
+    "- Point one about the topic.\n"
+    "- Point two with a supporting detail.\n"
+    "- Point three with a recommendation."
+)
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (4 characters per token), good enough for load shaping."""
+    return max(1, len(text) // 4)
+
+
+class LatencyPlan:
+    """Cycles through recorded per-model latencies, falling back to a default."""
+
+    def __init__(self, recorded: Optional[Dict[str, List[float]]] = None, default: float = 0.0):
+        self._cycles = {model: itertools.cycle(values) for model, values in (recorded or {}).items() if values}
+        self._default = default
+        self._lock = threading.Lock()
+
+    def next(self, model: str) -> float:
+        cycle = self._cycles.get(model) or self._cycles.get(model.split("/")[-1]) or self._cycles.get("default")
+        if cycle is None:
+            return self._default
+        with self._lock:
+            return next(cycle)
+
+
+class MockCerebrasServer:
+    """Local OpenAI-compatible stand-in for the Cerebras API.
+
+    Answers every chat completion with a CrewAI-style final answer after a
+    delay taken from recorded latencies, and tracks the time spent so the
+    harness can separate model time from framework overhead.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latencies: Optional[LatencyPlan] = None):
+        self.latencies = latencies or LatencyPlan()
+        self.stats = {"requests": 0, "model_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._stats_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def reset_stats(self) -> Dict:
+        """Returns the stats collected so far and starts counting from zero."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+            for key in self.stats:
+                self.stats[key] = 0
+        return stats
+
+    def start(self) -> "MockCerebrasServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _record(self, seconds: float, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["model_seconds"] += seconds
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                model = body.get("model", "")
+                prompt = "".join(str(m.get("content", "")) for m in body.get("messages", []))
+                prompt_tokens = count_tokens(prompt)
+                completion_tokens = count_tokens(FINAL_ANSWER)
+
+                delay = server.latencies.next(model)
+                time.sleep(delay)
+                server._record(delay, prompt_tokens, completion_tokens)
+
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+                if body.get("stream"):
+                    self._send_stream(model, usage)
+                else:
+                    self._send_json({
+                        "id": f"chatcmpl-{uuid.uuid4().hex}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": FINAL_ANSWER},
+                            "finish_reason": "stop"
+                        }],
+                        "usage": usage
+                    })
+
+            def _send_json(self, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, model, usage):
+                chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+                events = [{"content": word} for word in FINAL_ANSWER.split(" ")]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for i, delta in enumerate(events):
+                    if i:
+                        delta["content"] = " " + delta["content"]
+                    self._send_event({"id": chunk_id, "object": "chat.completion.chunk", "model": model,
+                                      "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+                self._send_event({"id": chunk_id, "object": "chat.completion.chunk", "model": model,
+                                  "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+            def _send_event(self, payload):
+                self.wfile.write(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+
+        return Handler
+
+
+def load_latencies(path: Optional[str], default: float) -> LatencyPlan:
+    """Loads recorded latencies: a JSON object mapping model (or "default") to seconds per call."""
+    if not path:
+        return LatencyPlan(default=default)
+    with open(path, encoding="utf-8") as f:
+        return LatencyPlan(json.load(f), default=default)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a mock OpenAI-compatible Cerebras API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latencies", help="JSON file of recorded per-model latencies")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed latency when none is recorded")
+    args = parser.parse_args()
+
+    server = MockCerebrasServer(args.host, args.port, load_latencies(args.latencies, args.latency)).start()
+    print(f"Mock Cerebras API on {server.base_url}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+from typing import Dict, List
+
+# Keep the harness fully offline
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+
+from benchmarks.mock_server import MockCerebrasServer, load_latencies
+from config import MODELS, OUTPUT_FORMATS
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus.json")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    """Aggregates per-run measurements into the reported metrics."""
+    wall = [run["wall_seconds"] for run in runs]
+    model = [run["model_seconds"] for run in runs]
+    overhead = [run["wall_seconds"] - run["model_seconds"] for run in runs]
+    tokens = [run["total_tokens"] for run in runs]
+    return {
+        "runs": len(runs),
+        "wall_p50": round(percentile(wall, 50), 4),
+        "wall_p95": round(percentile(wall, 95), 4),
+        "model_time_mean": round(sum(model) / len(model), 4),
+        "overhead_p50": round(percentile(overhead, 50), 4),
+        "overhead_p95": round(percentile(overhead, 95), 4),
+        "llm_calls_mean": round(sum(run["llm_calls"] for run in runs) / len(runs), 2),
+        "tokens_mean": round(sum(tokens) / len(tokens), 1)
+    }
+
+
+def run_once(server: MockCerebrasServer, model_name: str, task_type: str, goal: str, output_format: str) -> Dict:
+    """Runs one crew exactly as the app builds it, against the mock server."""
+    from crews import CODE_OUTPUT_FORMAT, build_crew
+    from resources import get_llm
+
+    llm = get_llm(model_name, "mock-key", base_url=server.base_url)
+    crew = build_crew(task_type, goal, CODE_OUTPUT_FORMAT if task_type == "code" else output_format, llm, [])
+    server.reset_stats()
+
+    started_at = time.perf_counter()
+    result = crew.kickoff()
+    wall = time.perf_counter() - started_at
+
+    stats = server.reset_stats()
+    token_usage = getattr(result, "token_usage", None)
+    return {
+        "wall_seconds": wall,
+        "model_seconds": stats["model_seconds"],
+        "llm_calls": stats["requests"],
+        "total_tokens": getattr(token_usage, "total_tokens", None) or stats["prompt_tokens"] + stats["completion_tokens"]
+    }
+
+
+def run_benchmark(models: List[str], repeats: int, latencies_path: str, latency: float, output_format: str) -> Dict:
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    server = MockCerebrasServer(latencies=load_latencies(latencies_path, latency)).start()
+    try:
+        results = {}
+        for model_name in models:
+            results[model_name] = {}
+            for task_type, goals in corpus.items():
+                runs = [
+                    run_once(server, model_name, task_type, goal, output_format)
+                    for goal in goals
+                    for _ in range(repeats)
+                ]
+                results[model_name][task_type] = summarize(runs)
+    finally:
+        server.stop()
+
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        crewai_version = version("crewai")
+    except PackageNotFoundError:
+        crewai_version = None
+
+    return {
+        "crewai_version": crewai_version,
+        "python": platform.python_version(),
+        "repeats": repeats,
+        "latencies": latencies_path or latency,
+        "results": results
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end crew latency against a mock Cerebras API")
+    parser.add_argument("--models", nargs="*", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--latencies", help="JSON file of recorded per-model latencies to replay")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed model latency per call when none is recorded")
+    parser.add_argument("--format", default=next(iter(OUTPUT_FORMATS)), choices=list(OUTPUT_FORMATS))
+    parser.add_argument("-o", "--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.models, args.repeats, args.latencies, args.latency, args.format)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import copy
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from config import CASSETTE
+
+MODES = ("off", "record", "replay")
+SPEEDS = ("recorded", "fast")
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode for a request the cassette has no recording of."""
+
+
+def request_key(kind: str, request: Dict) -> str:
+    """Stable hash of a request, used to match it against recordings."""
+    payload = json.dumps([kind, request], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    """Records LLM and search request/response pairs to disk, or serves them back.
+
+    A cassette is gzipped JSON lines, one interaction per line: kind ("llm"
+    or "serper"), request key, the request, the response and the seconds it
+    took. In replay mode identical requests are answered in the order they
+    were recorded (the last recording is reused once they run out), either
+    after the recorded latency or at once.
+    """
+
+    def __init__(self, path: str, mode: str = "off", speed: str = "recorded"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {', '.join(MODES)}")
+        if speed not in SPEEDS:
+            raise ValueError(f"Unknown cassette speed '{speed}', expected one of {', '.join(SPEEDS)}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        self._recordings: Dict[str, Deque[Dict]] = {}
+        self._last: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if mode == "replay":
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._recordings.setdefault(entry["key"], deque()).append(entry)
+        elif mode == "record":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def active(self) -> bool:
+        return self.mode != "off"
+
+    def through(self, kind: str, request: Dict, fetch: Callable[[], Any]) -> Any:
+        """Returns fetch(), recording it in record mode; in replay mode serves the recording instead."""
+        if self.mode == "replay":
+            return self.replay(kind, request)
+        if self.mode == "off":
+            return fetch()
+        started_at = time.perf_counter()
+        response = fetch()
+        seconds = time.perf_counter() - started_at
+        entry = {
+            "kind": kind,
+            "key": request_key(kind, request),
+            "seconds": round(seconds, 4),
+            "request": request,
+            "response": response
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            # Each append is its own gzip member; gzip readers concatenate them
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+            self.stats["recorded"] += 1
+        return response
+
+    def replay(self, kind: str, request: Dict) -> Any:
+        """The recorded response to this request, after its recorded latency unless speed is "fast"."""
+        key = request_key(kind, request)
+        with self._lock:
+            queue = self._recordings.get(key)
+            if queue:
+                entry = self._last[key] = queue.popleft()
+            else:
+                entry = self._last.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"No {kind} recording for request {key} in {self.path}")
+            self.stats["replayed"] += 1
+        if self.speed == "recorded":
+            time.sleep(entry["seconds"])
+        return copy.deepcopy(entry["response"])
+
+
+_lock = threading.Lock()
+_instance: Optional[Cassette] = None
+
+
+def get_cassette() -> Cassette:
+    """Returns the process-wide cassette configured in config.CASSETTE (or by use_cassette)."""
+    global _instance
+    if _instance is None:
+        with _lock:
+            if _instance is None:
+                _instance = Cassette(CASSETTE["path"], CASSETTE["mode"], CASSETTE["speed"])
+    return _instance
+
+
+def use_cassette(path: str, mode: str, speed: str = "recorded") -> Cassette:
+    """Replaces the process-wide cassette, e.g. from command-line flags."""
+    global _instance
+    with _lock:
+        _instance = Cassette(path, mode, speed)
+    return _instance
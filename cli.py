@@ -0,0 +1,186 @@
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+import jobs
+from config import BATCH, MODELS, OUTPUT_FORMATS, ROUTING, TOOLS
+
+DEFAULT_TOOLS = [tool_id for tool_id, tool in TOOLS.items() if tool["default"]]
+
+
+def _write_output(text: str, path: str) -> None:
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text if text.endswith("\n") else text + "\n")
+
+
+def _run_and_wait(job) -> int:
+    try:
+        job.wait()
+    except KeyboardInterrupt:
+        jobs.cancel(job)
+        job.wait()
+    if job.status != jobs.DONE:
+        print(f"Run failed: {job.error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_research(args, api_key: str) -> int:
+    import crews
+
+    tool_ids = [] if args.no_tools else args.tools or DEFAULT_TOOLS
+    job = crews.submit_request(
+        "parallel_research" if args.parallel else "research", args.goal, args.model, args.format, tool_ids, api_key,
+        use_cache=not args.bypass_cache, routing=args.routing
+    )
+    status = _run_and_wait(job)
+    if status == 0:
+        _write_output(job.result, args.output)
+    return status
+
+
+def cmd_code(args, api_key: str) -> int:
+    import crews
+
+    with open(args.path, encoding="utf-8") as f:
+        code = f.read()
+    job = crews.submit_request(
+        "code", code, args.model, crews.CODE_OUTPUT_FORMAT, [], api_key,
+        use_cache=not args.bypass_cache, routing=args.routing
+    )
+    status = _run_and_wait(job)
+    if status == 0:
+        _write_output(job.result, args.output)
+    return status
+
+
+def cmd_repo(args, api_key: str) -> int:
+    import crews
+    import repo_analysis
+
+    try:
+        if args.path.lower().endswith(".zip"):
+            with open(args.path, "rb") as f:
+                files = repo_analysis.collect_from_zip(f.read())
+        else:
+            files = repo_analysis.collect_from_directory(args.path)
+        job = crews.submit_repo(
+            os.path.abspath(args.path), files, args.model, api_key,
+            use_cache=not args.bypass_cache, routing=args.routing
+        )
+    except ValueError as e:
+        print(f"Could not read the project: {e}", file=sys.stderr)
+        return 1
+    status = _run_and_wait(job)
+    if status == 0:
+        _write_output(job.result, args.output)
+    return status
+
+
+def cmd_batch(args, api_key: str) -> int:
+    import batch
+    import crews
+
+    with open(args.path, "rb") as f:
+        items = batch.parse_goals(f.read(), args.path, args.model, args.format)
+    tool_ids = [] if args.no_tools else args.tools or DEFAULT_TOOLS
+    job = crews.submit_batch(
+        items, args.concurrency, args.model, args.format, tool_ids, api_key,
+        use_cache=not args.bypass_cache
+    )
+    status = _run_and_wait(job)
+    rows = batch.read_results(job.metadata["results_path"]) if "results_path" in job.metadata else []
+    as_csv = (args.output or "").lower().endswith(".csv")
+    _write_output(batch.to_csv(rows) if as_csv else batch.to_jsonl(rows), args.output)
+    print(job.result or job.error, file=sys.stderr)
+    return status
+
+
+def cmd_serve(args, api_key: str) -> int:
+    import server
+
+    server.serve(args.host, args.port)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run CrewAI × Cerebras research and code analysis without the UI")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="CASSETTE", help="Record LLM and search traffic to this cassette file")
+    cassette.add_argument("--replay", metavar="CASSETTE", help="Answer LLM and search calls from this cassette, offline")
+    parser.add_argument(
+        "--replay-speed", default="recorded", choices=["recorded", "fast"],
+        help="Wait out the recorded latencies, or answer replayed calls at once"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(sub, with_format=True, with_tools=True, with_routing=True):
+        sub.add_argument("--model", default=next(iter(MODELS)), choices=list(MODELS))
+        if with_routing:
+            sub.add_argument(
+                "--routing", default=ROUTING["default_mode"], choices=list(ROUTING["modes"]),
+                help="Fall back to or race other models on timeouts and rate limits"
+            )
+        if with_format:
+            sub.add_argument("--format", default=next(iter(OUTPUT_FORMATS)), choices=list(OUTPUT_FORMATS))
+        if with_tools:
+            sub.add_argument("--tools", nargs="*", choices=list(TOOLS), help="Tools to enable (default: the tools enabled in the UI)")
+            sub.add_argument("--no-tools", action="store_true", help="Run without any tools")
+        sub.add_argument("--bypass-cache", action="store_true", help="Ignore cached results")
+        sub.add_argument("-o", "--output", help="Write the result to this file instead of stdout")
+
+    research = subparsers.add_parser("research", help="Research a single goal")
+    research.add_argument("goal")
+    research.add_argument("--parallel", action="store_true", help="Research sub-questions in parallel, then synthesize")
+    add_common(research)
+    research.set_defaults(func=cmd_research)
+
+    code = subparsers.add_parser("code", help="Analyze a Python file")
+    code.add_argument("path")
+    add_common(code, with_format=False, with_tools=False)
+    code.set_defaults(func=cmd_code)
+
+    repo = subparsers.add_parser("repo", help="Analyze every Python file of a directory or zip archive")
+    repo.add_argument("path")
+    add_common(repo, with_format=False, with_tools=False)
+    repo.set_defaults(func=cmd_repo)
+
+    batch_parser = subparsers.add_parser("batch", help="Research every goal in a CSV or JSONL file")
+    batch_parser.add_argument("path")
+    batch_parser.add_argument("--concurrency", type=int, default=BATCH["default_concurrency"])
+    add_common(batch_parser, with_routing=False)
+    batch_parser.set_defaults(func=cmd_batch)
+
+    serve = subparsers.add_parser("serve", help="Start the HTTP API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None) -> int:
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+    if args.record or args.replay:
+        from cassette import use_cassette
+
+        use_cassette(args.record or args.replay, "record" if args.record else "replay", args.replay_speed)
+    if args.replay:
+        # Nothing leaves the machine when replaying, so keys need not be real
+        os.environ.setdefault("CEREBRAS_API_KEY", "replay")
+        os.environ.setdefault(TOOLS["serper"]["api_key_env"], "replay")
+    try:
+        api_key = os.environ["CEREBRAS_API_KEY"]
+    except KeyError:
+        print("CEREBRAS_API_KEY is not set (add it to your .env file).", file=sys.stderr)
+        return 2
+    return args.func(args, api_key)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
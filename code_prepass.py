@@ -0,0 +1,206 @@
+import ast
+import builtins
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from config import CODE_PREPASS
+
+_BRANCH_NODES = (
+    ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.ExceptHandler,
+    ast.With, ast.AsyncWith, ast.IfExp, ast.comprehension, ast.Assert, ast.match_case,
+)
+_BUILTIN_NAMES = set(dir(builtins))
+
+
+def cyclomatic_complexity(node: ast.AST) -> int:
+    """McCabe complexity: one plus the number of decision points."""
+    complexity = 1
+    for child in ast.walk(node):
+        if isinstance(child, _BRANCH_NODES):
+            complexity += 1
+        elif isinstance(child, ast.BoolOp):
+            complexity += len(child.values) - 1
+    return complexity
+
+
+def _max_depth(node: ast.AST, depth: int = 0) -> int:
+    deepest = depth
+    for child in ast.iter_child_nodes(node):
+        nested = isinstance(child, (ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.With, ast.AsyncWith))
+        deepest = max(deepest, _max_depth(child, depth + 1 if nested else depth))
+    return deepest
+
+
+def _function_metrics(node) -> Dict:
+    args = node.args
+    return {
+        "name": node.name,
+        "line": node.lineno,
+        "lines": node.end_lineno - node.lineno + 1,
+        "args": len(args.posonlyargs) + len(args.args) + len(args.kwonlyargs),
+        "complexity": cyclomatic_complexity(node),
+        "max_nesting": _max_depth(node),
+        "has_docstring": ast.get_docstring(node) is not None,
+    }
+
+
+def lint(tree: ast.Module) -> List[Tuple[int, str]]:
+    """Cheap local checks for common Python issues, as sorted (line, message) pairs."""
+    findings = []
+    imported = {}
+    used_names = set()
+    with_contexts = {
+        id(item.context_expr)
+        for node in ast.walk(tree) if isinstance(node, (ast.With, ast.AsyncWith))
+        for item in node.items
+    }
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ExceptHandler) and node.type is None:
+            findings.append((node.lineno, "bare 'except:' catches SystemExit and KeyboardInterrupt"))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for default in node.args.defaults + node.args.kw_defaults:
+                if isinstance(default, (ast.List, ast.Dict, ast.Set)):
+                    findings.append((node.lineno, f"mutable default argument in '{node.name}'"))
+            for arg in node.args.args + node.args.kwonlyargs:
+                if arg.arg in _BUILTIN_NAMES:
+                    findings.append((node.lineno, f"argument '{arg.arg}' shadows a builtin"))
+        elif isinstance(node, ast.Compare):
+            for op, right in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.Eq, ast.NotEq)) and isinstance(right, ast.Constant) and right.value is None:
+                    findings.append((node.lineno, "comparison to None should use 'is' / 'is not'"))
+        elif isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names):
+            findings.append((node.lineno, f"wildcard import from '{node.module}'"))
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                name = (alias.asname or alias.name).split(".")[0]
+                imported.setdefault(name, node.lineno)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            if node.func.id == "open" and id(node) not in with_contexts:
+                findings.append((node.lineno, "open() outside a 'with' block may leak the file handle"))
+            elif node.func.id in ("eval", "exec"):
+                findings.append((node.lineno, f"use of {node.func.id}()"))
+        if isinstance(node, ast.Name):
+            used_names.add(node.id)
+        elif isinstance(node, ast.Attribute):
+            root = node
+            while isinstance(root, ast.Attribute):
+                root = root.value
+            if isinstance(root, ast.Name):
+                used_names.add(root.id)
+
+    for name, line in imported.items():
+        if name != "*" and name not in used_names:
+            findings.append((line, f"'{name}' imported but unused"))
+    return sorted(findings)
+
+
+def _units(tree: ast.Module, max_lines: int) -> List[tuple]:
+    """Top-level statements as (end_line, name); oversized classes are split per member."""
+    units = []
+    for node in tree.body:
+        name = node.name if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) else None
+        if isinstance(node, ast.ClassDef) and node.end_lineno - node.lineno + 1 > max_lines:
+            for member in node.body:
+                member_name = getattr(member, "name", None)
+                units.append((member.end_lineno, f"{node.name}.{member_name}" if member_name else node.name))
+        else:
+            units.append((node.end_lineno, name))
+    return units
+
+
+def chunk_code(code: str, tree: ast.Module, max_lines: int) -> List[Dict]:
+    """Splits a module into chunks along statement boundaries.
+
+    Consecutive top-level statements (or members of a class too large to
+    review whole) are grouped until the next one would push the chunk past
+    max_lines.
+    """
+    lines = code.splitlines()
+    units = _units(tree, max_lines)
+    chunks: List[Dict] = []
+    start, names = 1, []
+    for index, (end, name) in enumerate(units):
+        if name:
+            names.append(name)
+        last = index + 1 == len(units)
+        if last or units[index + 1][0] - start + 1 > max_lines:
+            end = len(lines) if last else end
+            source = "\n".join(lines[start - 1:end])
+            chunks.append({
+                "start": start,
+                "end": end,
+                "names": names,
+                "source": source,
+                "hash": hashlib.sha256(source.encode("utf-8")).hexdigest()
+            })
+            start, names = end + 1, []
+    return chunks
+
+
+def analyze(code: str) -> Dict:
+    """Runs the local pre-pass: metrics, lint findings and (for large files) chunks."""
+    line_count = len(code.splitlines())
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return {"ok": False, "error": f"SyntaxError at line {e.lineno}: {e.msg}", "lines": line_count, "chunks": []}
+
+    functions = [
+        _function_metrics(node) for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    ]
+    classes = [node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
+    source_lines = [line for line in code.splitlines() if line.strip() and not line.strip().startswith("#")]
+
+    chunks = []
+    if line_count > CODE_PREPASS["chunk_threshold_lines"]:
+        chunks = chunk_code(code, tree, CODE_PREPASS["max_chunk_lines"])
+
+    return {
+        "ok": True,
+        "lines": line_count,
+        "source_lines": len(source_lines),
+        "functions": functions,
+        "classes": classes,
+        "module_docstring": ast.get_docstring(tree) is not None,
+        "findings": lint(tree),
+        "chunks": chunks,
+    }
+
+
+def format_findings(report: Dict, start: Optional[int] = None, end: Optional[int] = None) -> str:
+    """Renders pre-pass results as compact prompt context, optionally for a line range only."""
+    if not report["ok"]:
+        return f"- Could not parse the code: {report['error']}"
+
+    def in_range(line: int) -> bool:
+        return (start is None or line >= start) and (end is None or line <= end)
+
+    functions = [f for f in report["functions"] if in_range(f["line"])]
+    all_findings = [(line, message) for line, message in report["findings"] if in_range(line)]
+    limit = CODE_PREPASS["complexity_warning"]
+    out = []
+    if start is None and end is None:
+        out.append(
+            f"- {report['lines']} lines ({report['source_lines']} source), "
+            f"{len(report['functions'])} functions, {len(report['classes'])} classes"
+        )
+    for f in sorted(functions, key=lambda f: -f["complexity"])[:CODE_PREPASS["max_listed_functions"]]:
+        notes = []
+        if f["complexity"] > limit:
+            notes.append("high complexity")
+        if not f["has_docstring"]:
+            notes.append("no docstring")
+        out.append(
+            f"- {f['name']} (line {f['line']}): complexity {f['complexity']}, {f['lines']} lines, "
+            f"{f['args']} args, nesting {f['max_nesting']}" + (f" [{', '.join(notes)}]" if notes else "")
+        )
+    findings = all_findings[:CODE_PREPASS["max_listed_findings"]]
+    if findings:
+        out.append("- Lint findings:")
+        out.extend(f"  - line {line}: {message}" for line, message in findings)
+        hidden = len(all_findings) - len(findings)
+        if hidden > 0:
+            out.append(f"  - ... and {hidden} more")
+    return "\n".join(out)
@@ -1,18 +1,40 @@
+import os
+
+CEREBRAS_BASE_URL = "https://api.cerebras.ai/v1"
+DEFAULT_TEMPERATURE = 0.5
+
 MODELS = {
     "cerebras/llama-4-scout-17b-16e-instruct": {
         "name": "Llama 4 Scout",
         "description": "Latest Llama model optimized for instruction following",
-        "icon": "🦙"
+        "icon": "🦙",
+        "context_window": 8192,
+        "typical_latency_seconds": 1.0,
+        "cost_per_million_tokens": {"input": 0.65, "output": 0.85},
+        # Tokens of search evidence handed to the agent per tool call
+        "evidence_token_budget": 1200,
+        # Agent persona and tool texts, see PROMPT_PROFILES
+        "prompt_profile": "full"
     },
     "cerebras/llama3.1-8b": {
         "name": "Llama 3.1 (8B)",
         "description": "Efficient model for faster inference",
-        "icon": "⚡"
+        "icon": "⚡",
+        "context_window": 8192,
+        "typical_latency_seconds": 0.5,
+        "cost_per_million_tokens": {"input": 0.10, "output": 0.10},
+        "evidence_token_budget": 600,
+        "prompt_profile": "compact"
     },
     "cerebras/llama-3.3-70b": {
         "name": "Llama 3.3 (70B)",
         "description": "Largest model for most complex tasks",
-        "icon": "🧠"
+        "icon": "🧠",
+        "context_window": 8192,
+        "typical_latency_seconds": 2.0,
+        "cost_per_million_tokens": {"input": 0.85, "output": 1.20},
+        "evidence_token_budget": 1500,
+        "prompt_profile": "full"
     }
 }
 
@@ -21,23 +43,58 @@ TOOLS = {
         "name": "SerperDev Search",
         "description": "Search the web for recent information and developments",
         "icon": "🔍",
-        "default": True
+        "default": True,
+        "api_key_env": "SERPER_API_KEY",
+        # Tool description shown to agents under the compact prompt profile
+        "compact_description": "Web search; returns titles, links and snippets."
     }
 }
 
+# How much text agents carry in every system prompt. "full" uses the long
+# personas; "compact" uses short ones and short tool descriptions, for small
+# models where the fixed prompt is a large share of each call's input.
+PROMPT_PROFILES = {
+    "full": {"name": "Full", "description": "Detailed personas and tool descriptions"},
+    "compact": {"name": "Compact", "description": "Short personas and tool descriptions to cut input tokens"}
+}
+
 TASK_TYPES = {
     "research": {
         "name": "Research Analysis",
         "description": "Analyze trends and developments in a specific field",
-        "icon": "📚"
+        "icon": "📚",
+        # Per-run limits: wall-clock seconds once started and (estimated) LLM tokens; None means unlimited
+        "budget": {"max_seconds": 300, "max_tokens": 60_000}
+    },
+    "parallel_research": {
+        "name": "Parallel Research",
+        "description": "Split the goal into sub-questions researched in parallel, then synthesize one report",
+        "icon": "🧩",
+        "budget": {"max_seconds": 600, "max_tokens": 150_000}
     },
     "code": {
         "name": "Code Analysis",
         "description": "Analyze and improve Python code",
-        "icon": "💻"
+        "icon": "💻",
+        "budget": {"max_seconds": 600, "max_tokens": 120_000}
+    },
+    "repo": {
+        "name": "Repository Analysis",
+        "description": "Review every Python file of a zipped project or directory, then the project as a whole",
+        "icon": "📦",
+        "budget": {"max_seconds": 2 * 60 * 60, "max_tokens": 2_000_000}
+    },
+    "batch": {
+        "name": "Batch Research",
+        "description": "Run many research goals from an uploaded CSV or JSONL file",
+        "icon": "🗂️",
+        "budget": {"max_seconds": 3600, "max_tokens": None}
     }
 }
 
+# Output format name recorded for code analysis results
+CODE_OUTPUT_FORMAT = "Code Analysis"
+
 OUTPUT_FORMATS = {
     "executive_summary": {
         "name": "Executive Summary",
@@ -54,4 +111,213 @@ OUTPUT_FORMATS = {
         "description": "Key points in an easy-to-read format",
         "icon": "🔍"
     }
-} 
\ No newline at end of file
+}
+
+# Local on-disk storage (result cache and friends)
+CACHE_DIR = os.getenv("CREW_CACHE_DIR", ".crew_cache")
+
+# Record/replay of LLM and search traffic: "off", "record" (to the cassette at
+# path) or "replay" (from it, without network access)
+CASSETTE = {
+    "mode": os.getenv("CREW_CASSETTE_MODE", "off"),
+    "path": os.getenv("CREW_CASSETTE", os.path.join(CACHE_DIR, "cassettes", "session.jsonl.gz")),
+    # "recorded" waits out each recorded latency before answering, "fast" answers at once
+    "speed": os.getenv("CREW_CASSETTE_SPEED", "recorded")
+}
+
+RESULT_CACHE = {
+    "ttl_seconds": 24 * 60 * 60,
+    "max_bytes": 64 * 1024 * 1024
+}
+
+# Background crew runs
+WORKER_POOL = {
+    # Server-wide limit on crew runs executing at once; the rest wait in a per-user fair queue
+    "max_workers": int(os.getenv("CREW_MAX_ACTIVE_RUNS", "4")),
+    "retain_seconds": 60 * 60,
+    "poll_seconds": 0.5,
+    # Unfinished (queued or running) jobs one user may have at a time
+    "max_pending_per_user": 3,
+    # Finished jobs kept in memory per user, newest first; older ones stay in the run history
+    "max_retained_per_user": 5,
+    # Characters of a result, and of streamed LLM output, held per job
+    "max_result_chars": 200_000,
+    "max_stream_chars": 20_000
+}
+
+# CrewAI's verbose agent and crew logging; set CREW_VERBOSE=0 in production
+LOGGING = {
+    "verbose": os.getenv("CREW_VERBOSE", "1").lower() not in ("0", "false", "no", "off")
+}
+
+# Batch research runs
+BATCH = {
+    "default_concurrency": 4,
+    "max_concurrency": 16,
+    "max_rows": 1000,
+    # Crew runs started per minute, per model
+    "runs_per_minute": {
+        "cerebras/llama-4-scout-17b-16e-instruct": 30,
+        "cerebras/llama3.1-8b": 30,
+        "cerebras/llama-3.3-70b": 15
+    }
+}
+
+# Shared web search cache
+SEARCH_CACHE = {
+    "ttl_seconds": 6 * 60 * 60,
+    "max_entries": 2048
+}
+
+# Whole-repository code analysis
+REPO_ANALYSIS = {
+    # Per-file code analysis crews running at once within one repository run
+    "concurrency": 4,
+    "max_files": 2000,
+    "max_file_bytes": 512 * 1024,
+    # Files with fewer source lines only get the local pre-pass, not an LLM review
+    "min_source_lines": 5,
+    # Prompt tokens of per-file reviews handed to the project-level report
+    "aggregate_token_budget": 4000,
+    "max_review_chars": 1500,
+    # Lets app users analyze directories on the machine the app runs on (the CLI always can); opt in
+    # with CREW_REPO_LOCAL_PATHS=1 only where every app user may read the server's files
+    "allow_local_paths": os.getenv("CREW_REPO_LOCAL_PATHS", "0") == "1"
+}
+
+# Local static-analysis pre-pass for the code task
+CODE_PREPASS = {
+    # Files longer than this are reviewed chunk by chunk
+    "chunk_threshold_lines": 300,
+    "max_chunk_lines": 150,
+    "complexity_warning": 10,
+    "max_listed_functions": 15,
+    "max_listed_findings": 25
+}
+
+# App start-up. "background" imports CrewAI on a thread once the page has
+# rendered, "lazy" waits for the first run and "eager" imports before rendering.
+STARTUP = {
+    "preload": os.getenv("CREW_PRELOAD", "background"),
+    # Enforced by benchmarks/import_budget.py for the imports app.py makes up front
+    "import_budget_seconds": float(os.getenv("CREW_IMPORT_BUDGET", "2.0")),
+    "deferred_modules": ["crewai", "crewai_tools", "litellm"]
+}
+
+# Multi-model routing of LLM calls
+ROUTING = {
+    "modes": {
+        "single": {
+            "name": "Single model",
+            "description": "Use only the selected model",
+            "icon": "🎯"
+        },
+        "fallback": {
+            "name": "Fallback",
+            "description": "Move down the fallback chain on timeouts and rate limits",
+            "icon": "🪂"
+        },
+        "race": {
+            "name": "Race",
+            "description": "Send each call to several models and keep the first answer (costs more tokens)",
+            "icon": "🏁"
+        }
+    },
+    "default_mode": "single",
+    # Models later in the chain than the selected one are tried in order
+    "fallback_order": [
+        "cerebras/llama-3.3-70b",
+        "cerebras/llama-4-scout-17b-16e-instruct",
+        "cerebras/llama3.1-8b"
+    ],
+    "race_width": 2,
+    "call_timeout_seconds": 60,
+    # Per-model circuit breaker: open after this many consecutive timeouts/429s
+    "breaker_failure_threshold": 3,
+    "breaker_reset_seconds": 60
+}
+
+# Client-side rate limiting of Cerebras and Serper calls, shared by every
+# session in the process ("memory") or every process on the host ("sqlite")
+RATE_LIMITS = {
+    "backend": os.getenv("CREW_RATE_LIMIT_BACKEND", "memory"),
+    "limits": {
+        "cerebras/llama-4-scout-17b-16e-instruct": {"requests_per_minute": 30, "tokens_per_minute": 60000},
+        "cerebras/llama3.1-8b": {"requests_per_minute": 30, "tokens_per_minute": 60000},
+        "cerebras/llama-3.3-70b": {"requests_per_minute": 30, "tokens_per_minute": 60000},
+        "serper": {"requests_per_minute": 60}
+    },
+    # Largest burst a bucket allows, as seconds' worth of its rate
+    "burst_seconds": 10,
+    # Expected completion size added to the prompt estimate when reserving tokens
+    "completion_tokens_estimate": 512,
+    "max_retries": 4,
+    "backoff_base_seconds": 1.0,
+    "backoff_max_seconds": 30.0,
+    # After a 429 the allowed rate halves, down to this fraction of the limit...
+    "min_rate_fraction": 0.25,
+    # ...and recovers by this fraction of the limit per successful call
+    "recovery_per_success": 0.05
+}
+
+# Map-reduce research: sub-questions researched concurrently, then synthesized
+PARALLEL_RESEARCH = {
+    "max_subquestions": 4
+}
+
+# Similarity search over earlier research goals, in front of the exact-match cache
+SEMANTIC_CACHE = {
+    "enabled": True,
+    "task_types": ["research", "parallel_research"],
+    # Cosine similarity of hashed n-gram vectors needed to serve an earlier report. The two goals must
+    # also have the same key terms (semantic_cache.key_terms), which is what keeps a different place,
+    # year or topic out, so this only has to reject goals built very differently from the same words...
+    "threshold": 0.6,
+    # ...or to hand it to a new run as a starting point
+    "seed_threshold": 0.5,
+    "dimensions": 4096,
+    "max_entries": 5000
+}
+
+# Run history panel in the sidebar
+HISTORY = {
+    "page_size": 10,
+    "preview_chars": 60
+}
+
+# Compression of search results before they reach the research agent
+EVIDENCE = {
+    "enabled": True,
+    "max_snippet_chars": 400,
+    "include_related_searches": True
+}
+
+# Display and export of finished reports
+REPORT_RENDER = {
+    # Markdown characters per page; longer reports are split at headings, or at paragraphs within a long section
+    "page_chars": 12_000,
+    # Rendered reports kept in memory, least recently viewed dropped first
+    "cached_reports": 64,
+    "export_workers": 2,
+    # TTF font for PDF exports, e.g. DejaVuSans.ttf; without one, characters outside Latin-1 print as "?"
+    "pdf_font": os.getenv("CREW_PDF_FONT", "")
+}
+
+# Keep-alive HTTP client shared by Cerebras API and Serper requests
+HTTP_POOL = {
+    "http2": True,
+    # Per pool. Each run sends its requests over a pool of its own, which cancelling the run shuts down
+    "max_connections": 32,
+    "max_keepalive_connections": 16,
+    # Pools of finished runs kept, with their open connections, for the next runs
+    "idle_pools": 8,
+    # Idle connections are closed after this long; warming again reopens them
+    "idle_timeout_seconds": 120,
+    "connect_timeout_seconds": 5,
+    "timeout_seconds": 600,
+    # Requests made by a run wait at most this long per read, and never past the run's time limit
+    "job_timeout_seconds": 120,
+    "serper_timeout_seconds": 10,
+    # Endpoints connected to when the app or the API server starts, and when the app's model changes
+    "warm_urls": [f"{CEREBRAS_BASE_URL}/models", "https://google.serper.dev/search"]
+}
@@ -0,0 +1,474 @@
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from crewai import Crew, Process, Task
+
+import batch
+import code_prepass
+import jobs
+import parallel_research
+import repo_analysis
+from agents import get_code_analyst, get_research_analyst
+from cassette import get_cassette
+from config import CACHE_DIR, CODE_OUTPUT_FORMAT, EVIDENCE, LOGGING, MODELS, OUTPUT_FORMATS, ROUTING, SEMANTIC_CACHE, TASK_TYPES
+from evidence import EvidenceCompressor
+from history import get_history
+from instrumentation import RunTrace
+from prompt_profiles import profile_for
+from resources import get_tools
+from result_cache import get_result_cache, make_key
+from routing import RoutedLLM, get_routed_llm
+from semantic_cache import get_semantic_index, same_question, scope_key
+
+
+def build_crew(
+    task_type: str,
+    goal: str,
+    output_format: str,
+    llm,
+    tools: List,
+    step_callback: Optional[Callable] = None,
+    task_callback: Optional[Callable] = None,
+    prepass: Optional[Dict] = None,
+    chunk_reviews: Optional[Dict[str, str]] = None,
+    seed: Optional[str] = None,
+    label: Optional[str] = None,
+) -> Crew:
+    """Creates the crew for a research or code analysis request.
+
+    Code is run through the local static-analysis pre-pass first; large
+    modules get one review task per chunk (skipping chunks whose review is
+    in chunk_reviews, keyed by chunk hash) plus a final report task, and
+    label names the file when it is part of a larger project.
+    Research can be seeded with the report of a similar earlier goal.
+    """
+    if task_type == "code":
+        # Code analysis setup - static analysis only
+        agent = get_code_analyst(llm)
+        prepass = prepass or code_prepass.analyze(goal)
+        if prepass["chunks"]:
+            tasks = _chunked_code_tasks(agent, prepass, chunk_reviews or {})
+        else:
+            tasks = [Task(
+                description=(
+                    f"Analyze this Python code:\n{goal}\n\n"
+                    f"Static analysis already computed locally (build on it, do not recompute it):\n"
+                    f"{code_prepass.format_findings(prepass)}"
+                ),
+                expected_output="Analysis report with code quality assessment and recommendations",
+                agent=agent
+            )]
+        if label:
+            for task in tasks:
+                task.description = f"File `{label}` of a larger project.\n\n{task.description}"
+    else:
+        # Research setup
+        agent = get_research_analyst(llm, tools)
+        if seed:
+            goal = (
+                f"{goal}\n\nA report written earlier for a closely related goal is below. Reuse whatever "
+                f"still answers this goal and only research what is missing or different.\n\n{seed}"
+            )
+        tasks = [Task(
+            description=goal,
+            expected_output=f"{OUTPUT_FORMATS[output_format]['name']}",
+            agent=agent
+        )]
+
+    # Simplified crew setup
+    return Crew(
+        agents=[agent],
+        tasks=tasks,
+        process=Process.sequential,
+        verbose=LOGGING["verbose"],
+        step_callback=step_callback,
+        task_callback=task_callback
+    )
+
+
+def _chunked_code_tasks(agent, prepass: Dict, chunk_reviews: Dict[str, str]) -> List[Task]:
+    """Review tasks for the chunks without a cached review, plus the final report task."""
+    chunk_tasks, reused = [], []
+    for chunk in prepass["chunks"]:
+        label = f"lines {chunk['start']}-{chunk['end']}"
+        if chunk["names"]:
+            label += f" ({', '.join(chunk['names'][:6])})"
+        if chunk["hash"] in chunk_reviews:
+            reused.append(f"### {label}\n{chunk_reviews[chunk['hash']]}")
+            continue
+        chunk_tasks.append(Task(
+            description=(
+                f"Review this part of a larger Python module, {label}.\n\n"
+                f"Static analysis already computed locally:\n"
+                f"{code_prepass.format_findings(prepass, chunk['start'], chunk['end']) or '- nothing flagged'}\n\n"
+                f"```python\n{chunk['source']}\n```"
+            ),
+            expected_output="Concise review of this chunk: concrete issues and recommendations",
+            # Sequential on purpose: the chunks share one agent, whose executor CrewAI replaces on every
+            # task, and they must run on the job's thread to keep its cancellation, budget and trace
+            agent=agent
+        ))
+
+    description = (
+        f"Write the analysis report for a {prepass['lines']}-line Python module from the chunk reviews "
+        f"provided as context.\n\nModule-wide static analysis computed locally:\n{code_prepass.format_findings(prepass)}"
+    )
+    if reused:
+        description += "\n\nReviews of unchanged chunks from earlier runs:\n" + "\n\n".join(reused)
+    report_task = Task(
+        description=description,
+        expected_output="Analysis report with code quality assessment and recommendations",
+        agent=agent,
+        context=chunk_tasks or None
+    )
+    return chunk_tasks + [report_task]
+
+
+def _persists_results() -> bool:
+    """Whether runs read and write the result cache, run history and semantic index.
+
+    Not while a cassette records or replays: a cache hit would bypass the
+    cassette, and recorded or replayed runs are not real results.
+    """
+    return not get_cassette().active
+
+
+def _chunk_review_key(model_name: str, chunk: Dict) -> str:
+    return make_key(model_name, "code_chunk", chunk["source"], "", [])
+
+
+def run_crew(job, task_type, goal, output_format, model_name, api_key, tool_ids, cache_key, stream=False, routing="single",
+             seed=None) -> str:
+    """Builds and runs the crew for one request on a worker thread."""
+    llm = get_routed_llm(model_name, api_key, routing, stream=stream)
+    tools = get_tools(tool_ids, profile_for(model_name)) if task_type != "code" else []
+    result_cache = get_result_cache()
+    persist = _persists_results()
+
+    prepass, chunk_reviews, pending_chunks = None, {}, []
+    if task_type == "code":
+        prepass = code_prepass.analyze(goal)
+        for chunk in prepass["chunks"]:
+            cached = result_cache.get(_chunk_review_key(model_name, chunk)) if persist else None
+            if cached:
+                chunk_reviews[chunk["hash"]] = cached["result"]
+            else:
+                pending_chunks.append(chunk)
+        job.metadata["code_chunks"] = {"total": len(prepass["chunks"]), "reused": len(chunk_reviews)}
+
+    if task_type == "parallel_research":
+        def kickoff():
+            return parallel_research.run(job, goal, output_format, llm, tools)
+    else:
+        crew = build_crew(
+            task_type,
+            goal,
+            output_format,
+            llm,
+            tools,
+            step_callback=job.on_step,
+            task_callback=job.on_task_done,
+            prepass=prepass,
+            chunk_reviews=chunk_reviews,
+            seed=seed
+        )
+        job.total_tasks = len(crew.tasks)
+        kickoff = crew.kickoff
+    job.trace = RunTrace(job.id)
+    if tools and EVIDENCE["enabled"]:
+        job.evidence = EvidenceCompressor(goal, MODELS[model_name]["evidence_token_budget"])
+
+    started_at = time.perf_counter()
+    job.trace.start("crew", task_type, model=model_name)
+    try:
+        result = kickoff()
+    except Exception as e:
+        job.trace.end("crew", status="error", error=str(e))
+        job.trace.save()
+        raise
+    job.trace.end("crew")
+    elapsed = time.perf_counter() - started_at
+    job.trace.save()
+
+    token_usage = getattr(result, "token_usage", None)
+    job.metadata.update({
+        "elapsed_seconds": round(elapsed, 3),
+        "total_tokens": getattr(token_usage, "total_tokens", None),
+        "prompt_tokens": getattr(token_usage, "prompt_tokens", None),
+        "completion_tokens": getattr(token_usage, "completion_tokens", None),
+        "llm_requests": getattr(token_usage, "successful_requests", None),
+        "prompt_profile": profile_for(model_name),
+        "timings": job.trace.summary()
+    })
+    if job.evidence is not None and job.evidence.stats["searches"]:
+        job.metadata["evidence"] = dict(job.evidence.stats)
+    if isinstance(llm, RoutedLLM):
+        job.metadata.update(models_used=dict(llm.models_used), failovers=llm.failovers)
+    if not persist:
+        return str(result)
+    # Chunk review tasks come first, in the same order as the uncached chunks
+    for chunk, output in zip(pending_chunks, result.tasks_output):
+        result_cache.put(_chunk_review_key(model_name, chunk), output.raw, {"model": model_name})
+    result_cache.put(cache_key, str(result), job.metadata)
+    get_history().record(job.id, goal, str(result), job.metadata)
+    if task_type in SEMANTIC_CACHE["task_types"]:
+        get_semantic_index().add(cache_key, scope_key(task_type, output_format, tool_ids), model_name, goal)
+    return str(result)
+
+
+def run_repo_job(job, project, files, model_name, api_key, cache_key, routing="single") -> str:
+    """Runs the per-file code analysis crews and the project report for a repository on a worker thread."""
+    llm = get_routed_llm(model_name, api_key, routing)
+    result_cache = get_result_cache()
+    persist = _persists_results()
+
+    def review_file(path: str, source: str, prepass: Dict):
+        # Reviews of unchanged chunks in large files are shared with the code task
+        chunk_reviews, pending_chunks = {}, []
+        for chunk in prepass["chunks"]:
+            cached = result_cache.get(_chunk_review_key(model_name, chunk)) if persist else None
+            if cached:
+                chunk_reviews[chunk["hash"]] = cached["result"]
+            else:
+                pending_chunks.append(chunk)
+        crew = build_crew("code", source, CODE_OUTPUT_FORMAT, llm, [], prepass=prepass, chunk_reviews=chunk_reviews, label=path)
+        with jobs.crew_slot(job):
+            output = crew.kickoff()
+        for chunk, chunk_output in zip(pending_chunks, output.tasks_output if persist else []):
+            result_cache.put(_chunk_review_key(model_name, chunk), chunk_output.raw, {"model": model_name})
+        return output
+
+    job.trace = RunTrace(job.id)
+    started_at = time.perf_counter()
+    job.trace.start("crew", "repo", model=model_name)
+    try:
+        result = repo_analysis.run(job, project, files, model_name, llm, review_file, use_index=persist)
+    except Exception as e:
+        job.trace.end("crew", status="error", error=str(e))
+        job.trace.save()
+        raise
+    job.trace.end("crew")
+    elapsed = time.perf_counter() - started_at
+    job.trace.save()
+
+    token_usage = result.token_usage
+    job.metadata.update({
+        "elapsed_seconds": round(elapsed, 3),
+        "total_tokens": token_usage.total_tokens,
+        "prompt_tokens": token_usage.prompt_tokens,
+        "completion_tokens": token_usage.completion_tokens,
+        "llm_requests": token_usage.successful_requests,
+        "prompt_profile": profile_for(model_name),
+        "timings": job.trace.summary()
+    })
+    if isinstance(llm, RoutedLLM):
+        job.metadata.update(models_used=dict(llm.models_used), failovers=llm.failovers)
+    if persist:
+        result_cache.put(cache_key, str(result), job.metadata)
+        get_history().record(job.id, f"{project} ({len(files)} Python files)", str(result), job.metadata)
+    return str(result)
+
+
+def _semantic_lookup(task_type, goal, model_name, output_format, tool_ids):
+    """Finds earlier runs of similarly phrased goals.
+
+    Returns (entry, cached) for a same-model run similar enough to serve
+    as-is, otherwise (None, seed) where seed is the best earlier run
+    similar enough to start from, or None. Serving also needs the same key
+    terms in both goals: a different place, year or topic word ("risks"
+    vs "benefits") can still score high, but asks a different question.
+    """
+    result_cache = get_result_cache()
+    index = get_semantic_index()
+    seed = None
+    scope = scope_key(task_type, output_format, tool_ids)
+    for entry in index.search(goal, scope, SEMANTIC_CACHE["seed_threshold"]):
+        cached = result_cache.get(entry["key"])
+        if cached is None:
+            index.remove(entry["key"])
+            continue
+        match = {"goal": entry["goal"], "model": entry["model"], "score": round(entry["score"], 3)}
+        if entry["model"] == model_name and same_question(goal, entry["goal"], entry["score"]):
+            return match, cached
+        if seed is None:
+            seed = {**match, "report": cached["result"]}
+    return None, seed
+
+
+def run_batch_job(job, items, concurrency, api_key, tool_ids, use_cache) -> str:
+    """Runs every goal of a batch as its own research crew on a worker thread."""
+    result_cache = get_result_cache()
+
+    def run_item(item):
+        cache_key = make_key(item["model"], "research", item["goal"], item["output_format"], tool_ids)
+        cached = result_cache.get(cache_key) if use_cache else None
+        if cached:
+            return cached["result"]
+        item_job = jobs.Job(f"{job.id}-{item['row']}")
+        # Each row has the research budget and also stops with its batch
+        item_job.parent = job
+        item_job.budget = dict(TASK_TYPES["research"]["budget"])
+        item_job.started_at = time.time()
+        item_job.metadata.update(
+            model=item["model"],
+            task_type="research",
+            output_format=item["output_format"],
+            tools=list(tool_ids)
+        )
+        token = jobs.current_job.set(item_job)
+        try:
+            with jobs.crew_slot(job):
+                return run_crew(item_job, "research", item["goal"], item["output_format"], item["model"], api_key, tool_ids, cache_key)
+        finally:
+            jobs.current_job.reset(token)
+            item_job.release()
+
+    results_path = os.path.join(CACHE_DIR, "batches", f"{job.id}.jsonl")
+    return batch.run_batch(job, items, run_item, concurrency, results_path)
+
+
+def submit_request(
+    task_type: str,
+    goal: str,
+    model_name: str,
+    output_format: str,
+    tool_ids: Iterable[str],
+    api_key: str,
+    use_cache: bool = True,
+    stream: bool = False,
+    routing: str = ROUTING["default_mode"],
+    owner: Optional[str] = None,
+) -> jobs.Job:
+    """Queues a research or code request, answering from the result cache when possible.
+
+    owner identifies the user (e.g. a browser session) for the fair queue and
+    per-user job limits in jobs.submit.
+    """
+    if task_type == "code":
+        output_format, tool_ids = CODE_OUTPUT_FORMAT, []
+    tool_ids = sorted(set(tool_ids))
+    use_cache = use_cache and _persists_results()
+    # Racing models, and the concurrent sub-question crews of a parallel research run, would
+    # interleave their chunks in the job's single stream, so those runs never stream
+    stream = stream and routing != "race" and task_type != "parallel_research"
+    metadata: Dict = {
+        "model": model_name,
+        "task_type": task_type,
+        "output_format": output_format,
+        "tools": tool_ids,
+        "stream": stream,
+        "routing": routing
+    }
+    cache_key = make_key(model_name, task_type, goal, output_format, tool_ids)
+    cached = get_result_cache().get(cache_key) if use_cache else None
+    if cached:
+        return jobs.completed(cached["result"], {**cached["metadata"], **metadata, "cached": True}, owner)
+
+    seed = None
+    if use_cache and SEMANTIC_CACHE["enabled"] and task_type in SEMANTIC_CACHE["task_types"]:
+        match, found = _semantic_lookup(task_type, goal, model_name, output_format, tool_ids)
+        if match:
+            return jobs.completed(
+                found["result"], {**found["metadata"], **metadata, "cached": True, "semantic_match": match}, owner
+            )
+        if found:
+            seed = found.pop("report")
+            metadata["seeded_from"] = found
+    return jobs.submit(
+        run_crew,
+        task_type,
+        goal,
+        output_format,
+        model_name,
+        api_key,
+        tool_ids,
+        cache_key,
+        stream,
+        routing,
+        seed,
+        metadata=metadata,
+        owner=owner,
+        budget=TASK_TYPES[task_type]["budget"]
+    )
+
+
+def submit_repo(
+    project: str,
+    files: Dict[str, str],
+    model_name: str,
+    api_key: str,
+    use_cache: bool = True,
+    routing: str = ROUTING["default_mode"],
+    owner: Optional[str] = None,
+) -> jobs.Job:
+    """Queues the analysis of a project's Python files (see repo_analysis.collect_from_zip/collect_from_directory).
+
+    An identical tree is answered from the result cache; otherwise only
+    files without a stored review are sent to the model.
+    """
+    if not files:
+        raise ValueError("No Python files found")
+    use_cache = use_cache and _persists_results()
+    metadata: Dict = {
+        "model": model_name,
+        "task_type": "repo",
+        "output_format": CODE_OUTPUT_FORMAT,
+        "tools": [],
+        "stream": False,
+        "routing": routing
+    }
+    manifest = "\n".join(f"{path} {repo_analysis.content_hash(source)}" for path, source in sorted(files.items()))
+    cache_key = make_key(model_name, "repo", f"{project}\n{manifest}", CODE_OUTPUT_FORMAT, [])
+    cached = get_result_cache().get(cache_key) if use_cache else None
+    if cached:
+        return jobs.completed(cached["result"], {**cached["metadata"], **metadata, "cached": True}, owner)
+    return jobs.submit(
+        run_repo_job,
+        project,
+        files,
+        model_name,
+        api_key,
+        cache_key,
+        routing,
+        metadata=metadata,
+        owner=owner,
+        budget=TASK_TYPES["repo"]["budget"]
+    )
+
+
+def submit_batch(
+    items: List[Dict],
+    concurrency: int,
+    model_name: str,
+    output_format: str,
+    tool_ids: Iterable[str],
+    api_key: str,
+    use_cache: bool = True,
+    owner: Optional[str] = None,
+) -> jobs.Job:
+    """Queues a batch of research goals parsed by batch.parse_goals.
+
+    The batch takes one run slot in the queue; its rows' crews run in that
+    slot and in free slots borrowed through jobs.crew_slot.
+    """
+    tool_ids = sorted(set(tool_ids))
+    use_cache = use_cache and _persists_results()
+    return jobs.submit(
+        run_batch_job,
+        items,
+        concurrency,
+        api_key,
+        tool_ids,
+        use_cache,
+        metadata={
+            "model": model_name,
+            "task_type": "batch",
+            "output_format": output_format,
+            "tools": tool_ids,
+            "stream": False,
+            "rows": len(items)
+        },
+        owner=owner,
+        budget=TASK_TYPES["batch"]["budget"]
+    )
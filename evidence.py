@@ -0,0 +1,121 @@
+import hashlib
+import json
+import threading
+from typing import Dict, List
+
+import numpy as np
+
+from config import EVIDENCE
+from instrumentation import estimate_tokens
+from semantic_cache import embed
+
+_DIMENSIONS = 2048
+
+
+def extract_snippets(results: Dict) -> List[Dict]:
+    """Flattens a SerperDevTool result into uniform {title, link, text} snippets."""
+    snippets = []
+    kg = results.get("knowledgeGraph")
+    if kg and kg.get("description"):
+        attributes = "; ".join(f"{k}: {v}" for k, v in (kg.get("attributes") or {}).items())
+        snippets.append({
+            "title": kg.get("title", ""),
+            "link": kg.get("descriptionLink") or kg.get("website", ""),
+            "text": " ".join(filter(None, [kg["description"], attributes]))
+        })
+    for item in results.get("organic", []) + results.get("news", []):
+        text = item.get("snippet", "")
+        if item.get("date"):
+            text = f"({item['date']}) {text}"
+        snippets.append({"title": item.get("title", ""), "link": item.get("link", ""), "text": text})
+    for item in results.get("peopleAlsoAsk", []):
+        snippets.append({
+            "title": item.get("question", ""),
+            "link": item.get("link", ""),
+            "text": item.get("snippet", "")
+        })
+    return [s for s in snippets if s["text"] or s["title"]]
+
+
+def _fingerprint(snippet: Dict) -> str:
+    words = " ".join(snippet["text"].casefold().split())
+    return hashlib.sha1(words.encode("utf-8")).hexdigest()
+
+
+class EvidenceCompressor:
+    """Turns raw search results into a ranked, deduplicated, budgeted digest for one run.
+
+    Snippets already shown earlier in the run (same link or same text) are
+    dropped, the rest are ranked by similarity to the goal and the search
+    query, and the digest is cut off at the model's token budget.
+    """
+
+    def __init__(self, goal: str, token_budget: int):
+        self.goal = goal
+        self.token_budget = token_budget
+        self.stats = {"searches": 0, "raw_tokens": 0, "kept_tokens": 0, "saved_tokens": 0, "duplicates": 0}
+        self._seen_links = set()
+        self._seen_text = set()
+        self._lock = threading.Lock()
+
+    def compress(self, query: str, results: Dict) -> str:
+        snippets = extract_snippets(results)
+        fresh, links, fingerprints = [], set(), set()
+        with self._lock:
+            for snippet in snippets:
+                link, fingerprint = snippet["link"], _fingerprint(snippet)
+                if (link and (link in self._seen_links or link in links)) or fingerprint in self._seen_text | fingerprints:
+                    continue
+                links.add(link)
+                fingerprints.add(fingerprint)
+                fresh.append((snippet, fingerprint))
+        duplicates = len(snippets) - len(fresh)
+
+        if fresh:
+            target = embed(f"{self.goal} {query}", _DIMENSIONS)
+            vectors = np.stack([embed(f"{s['title']} {s['text']}", _DIMENSIONS) for s, _ in fresh])
+            fresh = [fresh[i] for i in np.argsort(-(vectors @ target), kind="stable")]
+
+        header = f"Search results for \"{query}\", most relevant first"
+        if duplicates:
+            header += f" ({duplicates} duplicates of results already shown omitted)"
+        lines = [header + ":"]
+        used = estimate_tokens(header)
+        max_chars = EVIDENCE["max_snippet_chars"]
+        shown = []
+        for rank, (snippet, fingerprint) in enumerate(fresh, 1):
+            text = snippet["text"] if len(snippet["text"]) <= max_chars else snippet["text"][:max_chars].rsplit(" ", 1)[0] + "…"
+            line = f"{rank}. {snippet['title']}: {text} [{snippet['link']}]"
+            cost = estimate_tokens(line)
+            if used + cost > self.token_budget:
+                room = (self.token_budget - used) * 4
+                if room > 80:
+                    lines.append(line[:room].rsplit(" ", 1)[0] + "…")
+                    shown.append((snippet, fingerprint))
+                cut = len(fresh) - len(shown)
+                if cut:
+                    lines.append(f"({cut} lower-ranked results cut to fit the context budget)")
+                break
+            lines.append(line)
+            shown.append((snippet, fingerprint))
+            used += cost
+        # Only what the agent actually saw counts as shown; cut results may be offered again by a later search
+        with self._lock:
+            for snippet, fingerprint in shown:
+                if snippet["link"]:
+                    self._seen_links.add(snippet["link"])
+                self._seen_text.add(fingerprint)
+        if EVIDENCE["include_related_searches"] and results.get("relatedSearches"):
+            lines.append("Related searches: " + "; ".join(r["query"] for r in results["relatedSearches"]))
+
+        digest = "\n".join(lines)
+        # The agent would otherwise see the tool's dict rendered as text
+        raw_tokens = estimate_tokens(json.dumps(results, ensure_ascii=False))
+        kept_tokens = estimate_tokens(digest)
+        with self._lock:
+            self.stats["searches"] += 1
+            self.stats["raw_tokens"] += raw_tokens
+            self.stats["kept_tokens"] += kept_tokens
+            self.stats["saved_tokens"] += max(raw_tokens - kept_tokens, 0)
+            self.stats["duplicates"] += duplicates
+        return digest
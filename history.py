@@ -0,0 +1,137 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import CACHE_DIR
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    task_type TEXT NOT NULL,
+    model TEXT NOT NULL,
+    output_format TEXT NOT NULL,
+    tools TEXT NOT NULL,
+    goal TEXT NOT NULL,
+    result TEXT NOT NULL,
+    elapsed_seconds REAL,
+    total_tokens INTEGER,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5(goal, result, content='runs', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS runs_fts_insert AFTER INSERT ON runs BEGIN
+    INSERT INTO runs_fts (rowid, goal, result) VALUES (new.id, new.goal, new.result);
+END;
+"""
+
+# Columns listed in the history panel; the result is only read when a run is opened
+_SUMMARY_COLUMNS = "id, job_id, created_at, task_type, model, output_format, goal, elapsed_seconds, total_tokens"
+
+
+def _fts_query(text: str) -> str:
+    """Turns free text into an FTS5 query matching every word as a prefix."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+class RunHistory:
+    """Append-only SQLite log of finished runs, full-text indexed on goal and result."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            try:
+                conn.executescript(_FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5: search falls back to LIKE
+                self.fts = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, job_id: str, goal: str, result: str, metadata: Dict) -> int:
+        """Appends a finished run and returns its id."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (job_id, created_at, task_type, model, output_format, tools, goal, result, "
+                "elapsed_seconds, total_tokens, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    time.time(),
+                    metadata.get("task_type", ""),
+                    metadata.get("model", ""),
+                    metadata.get("output_format", ""),
+                    json.dumps(metadata.get("tools", [])),
+                    goal,
+                    result,
+                    metadata.get("elapsed_seconds"),
+                    metadata.get("total_tokens"),
+                    json.dumps(metadata, default=str)
+                )
+            )
+            return cursor.lastrowid
+
+    def page(self, query: str = "", offset: int = 0, limit: int = 10) -> Tuple[List[Dict], bool]:
+        """Newest runs first (matching query, if given), without results; also says whether more exist."""
+        params: list = []
+        if query.strip() and self.fts and _fts_query(query):
+            sql = (
+                f"SELECT {_SUMMARY_COLUMNS} FROM runs WHERE id IN "
+                f"(SELECT rowid FROM runs_fts WHERE runs_fts MATCH ?) ORDER BY id DESC LIMIT ? OFFSET ?"
+            )
+            params.append(_fts_query(query))
+        elif query.strip():
+            sql = f"SELECT {_SUMMARY_COLUMNS} FROM runs WHERE goal LIKE ? OR result LIKE ? ORDER BY id DESC LIMIT ? OFFSET ?"
+            params += [f"%{query.strip()}%"] * 2
+        else:
+            sql = f"SELECT {_SUMMARY_COLUMNS} FROM runs ORDER BY id DESC LIMIT ? OFFSET ?"
+        # One extra row tells whether there is another page
+        params += [limit + 1, offset]
+        with self._connect() as conn:
+            rows = [dict(row) for row in conn.execute(sql, params)]
+        return rows[:limit], len(rows) > limit
+
+    def get(self, run_id: int) -> Optional[Dict]:
+        """Returns a run with its result and metadata, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        run = dict(row)
+        run["tools"] = json.loads(run["tools"])
+        run["metadata"] = json.loads(run["metadata"])
+        return run
+
+
+_lock = threading.Lock()
+_instance: Optional[RunHistory] = None
+
+
+def get_history() -> RunHistory:
+    """Returns the process-wide run history in CACHE_DIR."""
+    global _instance
+    if _instance is None:
+        with _lock:
+            if _instance is None:
+                _instance = RunHistory(os.path.join(CACHE_DIR, "history.sqlite3"))
+    return _instance
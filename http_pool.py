@@ -0,0 +1,225 @@
+import importlib.util
+import socket
+import threading
+import time
+import weakref
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+
+import jobs
+from config import HTTP_POOL
+
+_lock = threading.Lock()
+_client: Optional[httpx.Client] = None
+# Per host: requests sent, how many opened a new connection, time spent connecting, requests over HTTP/2
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _count(host: str, new_connection: bool, connect_seconds: float, http2: bool) -> None:
+    job = jobs.current_job.get()
+    with _lock:
+        targets = [_stats.setdefault(host, {"requests": 0, "new_connections": 0, "connect_seconds": 0.0, "http2": 0})]
+        if job is not None:
+            targets.append(job.metadata.setdefault(
+                "connections", {"requests": 0, "new_connections": 0, "connect_seconds": 0.0, "http2": 0}
+            ))
+        for target in targets:
+            target["requests"] += 1
+            target["new_connections"] += new_connection
+            target["connect_seconds"] = round(target["connect_seconds"] + connect_seconds, 4)
+            target["http2"] += http2
+
+
+def _trace_request(request: httpx.Request) -> None:
+    """Attaches an httpcore trace that tells whether the request opened a connection or reused one."""
+    connecting: Dict[str, float] = {}
+
+    def trace(event: str, info: Dict) -> None:
+        if event == "connection.connect_tcp.started":
+            connecting["started"] = time.perf_counter()
+        elif event in ("connection.start_tls.complete", "connection.connect_tcp.complete") and "started" in connecting:
+            # Plain HTTP has no TLS step, so the TCP connect is the whole setup
+            connecting["seconds"] = time.perf_counter() - connecting["started"]
+        elif event.endswith("receive_response_headers.complete"):
+            _count(request.url.host, "started" in connecting, connecting.get("seconds", 0.0), event.startswith("http2."))
+
+    request.extensions["trace"] = trace
+
+
+def _limit_to_job(request: httpx.Request) -> None:
+    """Shortens the timeouts of a run's request so it cannot outlive the run's time limit."""
+    job = jobs.current_job.get()
+    if job is None:
+        return
+    limit = HTTP_POOL["job_timeout_seconds"]
+    if job.deadline is not None:
+        limit = min(limit, max(job.deadline - time.time(), 1.0))
+    timeout = request.extensions.get("timeout", {})
+    request.extensions["timeout"] = {
+        name: min(seconds, limit) if seconds is not None else limit
+        for name, seconds in {"connect": None, "read": None, "write": None, "pool": None, **timeout}.items()
+    }
+
+
+class _Connections:
+    """A connection pool used by one run, or one request outside a run, at a time.
+
+    Pools are handed back for reuse when a run finishes, so later runs still
+    skip connection setup, but never shared by two runs at once: cancelling
+    a run shuts down its sockets, failing its requests mid-flight, without
+    touching anyone else's.
+    """
+
+    def __init__(self):
+        self.transport = httpx.HTTPTransport(
+            # HTTP/2 needs the h2 package; without it connections are still kept alive over HTTP/1.1
+            http2=HTTP_POOL["http2"] and importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL["max_connections"],
+                max_keepalive_connections=HTTP_POOL["max_keepalive_connections"],
+                keepalive_expiry=HTTP_POOL["idle_timeout_seconds"]
+            )
+        )
+        self.job = None
+        self._streams: List = []
+        self._streams_lock = threading.Lock()
+
+    def send(self, request: httpx.Request) -> httpx.Response:
+        trace = request.extensions.get("trace")
+
+        def track_sockets(event: str, info: Dict) -> None:
+            # TLS takes over the TCP socket, so the stream it returns replaces the plain one
+            if event in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+                with self._streams_lock:
+                    self._streams = [s for s in self._streams if s.get_extra_info("socket").fileno() != -1]
+                    self._streams.append(info["return_value"])
+            if trace is not None:
+                trace(event, info)
+
+        request.extensions["trace"] = track_sockets
+        return self.transport.handle_request(request)
+
+    def close(self) -> None:
+        """Called by the run when it stops: a cancelled run's sockets are shut down, others are kept for reuse."""
+        job, self.job = self.job, None
+        if job is None:
+            return
+        with _lock:
+            _runs.pop(job, None)
+        if job.cancelled:
+            self.shut_down()
+        else:
+            _put_idle(self)
+
+    def shut_down(self) -> None:
+        with self._streams_lock:
+            streams, self._streams = self._streams, []
+        for stream in streams:
+            try:
+                # Unlike close(), shutdown() also wakes a thread blocked reading the socket
+                stream.get_extra_info("socket").shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.transport.close()
+
+
+# The pool each unfinished run is using; runs only hold a weak reference to it
+_runs: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+# Pools not in use, most recently used last
+_idle: List[_Connections] = []
+
+
+def _take_idle() -> _Connections:
+    with _lock:
+        if _idle:
+            return _idle.pop()
+    return _Connections()
+
+
+def _put_idle(connections: _Connections) -> None:
+    with _lock:
+        _idle.append(connections)
+        surplus = _idle[:-HTTP_POOL["idle_pools"]]
+        del _idle[:-HTTP_POOL["idle_pools"]]
+    for extra in surplus:
+        extra.shut_down()
+
+
+class _RoutingTransport(httpx.BaseTransport):
+    """Sends each run's requests over its own pool, and other requests over an idle pool borrowed per request."""
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        job = jobs.current_job.get()
+        if job is None:
+            connections = _take_idle()
+            try:
+                return connections.send(request)
+            finally:
+                _put_idle(connections)
+        job.check()
+        with _lock:
+            connections = _runs.get(job)
+        if connections is None:
+            connections = _take_idle()
+            connections.job = job
+            with _lock:
+                _runs[job] = connections
+            job.track(connections)
+        return connections.send(request)
+
+    def close(self) -> None:
+        with _lock:
+            pools = list(_idle) + list(_runs.values())
+            _idle.clear()
+        for connections in pools:
+            connections.shut_down()
+
+
+def get_client() -> httpx.Client:
+    """Returns the process-wide keep-alive client shared by Cerebras (through LiteLLM) and Serper calls."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = httpx.Client(
+                    transport=_RoutingTransport(),
+                    timeout=httpx.Timeout(HTTP_POOL["timeout_seconds"], connect=HTTP_POOL["connect_timeout_seconds"]),
+                    event_hooks={"request": [_trace_request, _limit_to_job]}
+                )
+    return _client
+
+
+def install() -> None:
+    """Makes LiteLLM's OpenAI-compatible providers, Cerebras among them, send requests through the shared client."""
+    import litellm
+
+    litellm.client_session = get_client()
+
+
+def warm(urls: Optional[Iterable[str]] = None) -> Dict[str, Optional[float]]:
+    """Opens, or keeps open, a connection to each endpoint; returns the seconds each took (None on failure).
+
+    Any response counts: the point is the DNS lookup, TCP connect and TLS
+    handshake, which later calls to the same host then skip.
+    """
+    client = get_client()
+    timings: Dict[str, Optional[float]] = {}
+    for url in urls or HTTP_POOL["warm_urls"]:
+        started_at = time.perf_counter()
+        try:
+            client.head(url, timeout=HTTP_POOL["connect_timeout_seconds"])
+        except httpx.HTTPError:
+            timings[url] = None
+        else:
+            timings[url] = round(time.perf_counter() - started_at, 3)
+    return timings
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    """Connection reuse per host since the process started."""
+    with _lock:
+        return {
+            host: {**counts, "reused": counts["requests"] - counts["new_connections"]}
+            for host, counts in _stats.items()
+        }
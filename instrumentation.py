@@ -0,0 +1,259 @@
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from crewai.utilities.events import (
+    LLMCallCompletedEvent,
+    LLMCallFailedEvent,
+    LLMCallStartedEvent,
+    TaskCompletedEvent,
+    TaskFailedEvent,
+    TaskStartedEvent,
+    ToolUsageErrorEvent,
+    ToolUsageFinishedEvent,
+    ToolUsageStartedEvent,
+    crewai_event_bus,
+)
+
+import jobs
+from config import CACHE_DIR
+from prompt_profiles import extra_chars_under_full
+
+SPAN_KINDS = ("crew", "task", "llm", "tool")
+
+# Spans opened and not yet closed in the current context, as {"trace": RunTrace, kind: (span, ...)}.
+# CrewAI emits an event's start and end on the thread doing the work, and helper threads run with
+# a copy of the context, so concurrent crews, tasks and calls each close their own spans and nest
+# under their own task.
+_open_spans: contextvars.ContextVar = contextvars.ContextVar("open_spans", default=None)
+
+
+def estimate_tokens(content) -> int:
+    """Approximate token count of a prompt or response (about 4 characters per token)."""
+    if isinstance(content, list):
+        content = "".join(str(m.get("content", "")) if isinstance(m, dict) else str(m) for m in content)
+    return len(str(content or "")) // 4
+
+
+def prefix_id(messages) -> Optional[str]:
+    """Short hash of a prompt's system message; calls sharing it can hit the provider's prompt cache."""
+    if not isinstance(messages, list) or not messages or not isinstance(messages[0], dict):
+        return None
+    if messages[0].get("role") != "system":
+        return None
+    return hashlib.sha1(str(messages[0].get("content", "")).encode("utf-8")).hexdigest()[:8]
+
+
+class RunTrace:
+    """Timing spans for one crew run: the crew, its tasks, LLM calls and tool calls."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def _open_here(self) -> Dict:
+        """This trace's spans left open in the current context (a worker thread may have served other runs)."""
+        open_spans = _open_spans.get()
+        return open_spans if open_spans is not None and open_spans["trace"] is self else {"trace": self}
+
+    def start(self, kind: str, name: str, **attributes) -> Dict:
+        """Opens a span nested under the innermost task (or crew) span open in this context."""
+        open_spans = self._open_here()
+        parent = (open_spans.get("task") or open_spans.get("crew") or (None,))[-1]
+        with self._lock:
+            span = {
+                "span_id": uuid.uuid4().hex[:16],
+                "parent_id": parent["span_id"] if parent else None,
+                "kind": kind,
+                "name": name,
+                "start": time.time(),
+                "end": None,
+                "status": "ok",
+                "attributes": attributes
+            }
+            self.spans.append(span)
+        _open_spans.set({**open_spans, kind: open_spans.get(kind, ()) + (span,)})
+        return span
+
+    def end(self, kind: str, status: str = "ok", **attributes) -> Optional[Dict]:
+        """Closes the span of this kind most recently opened in this context."""
+        open_spans = self._open_here()
+        if not open_spans.get(kind):
+            return None
+        span = open_spans[kind][-1]
+        _open_spans.set({**open_spans, kind: open_spans[kind][:-1]})
+        with self._lock:
+            span["end"] = time.time()
+            span["status"] = status
+            span["attributes"].update(attributes)
+        return span
+
+    def summary(self) -> Dict:
+        """Totals per span kind: count, seconds and (estimated) tokens."""
+        totals = {kind: {"count": 0, "seconds": 0.0, "tokens": 0} for kind in SPAN_KINDS}
+        prefixes = set()
+        input_tokens = full_profile_input_tokens = 0
+        for span in self.spans:
+            if span["end"] is None:
+                continue
+            total = totals[span["kind"]]
+            total["count"] += 1
+            total["seconds"] += span["end"] - span["start"]
+            total["tokens"] += span["attributes"].get("prompt_tokens_est", 0) + span["attributes"].get("completion_tokens_est", 0)
+            if span["kind"] == "llm":
+                input_tokens += span["attributes"].get("prompt_tokens_est", 0)
+                full_profile_input_tokens += span["attributes"].get("full_profile_prompt_tokens_est", 0)
+                prefixes.add(span["attributes"].get("prefix"))
+        for total in totals.values():
+            total["seconds"] = round(total["seconds"], 3)
+        totals["llm"].update(
+            input_tokens=input_tokens,
+            full_profile_input_tokens=full_profile_input_tokens,
+            prefixes=len(prefixes - {None})
+        )
+        return totals
+
+    def rows(self) -> List[Dict]:
+        """Flat per-span rows for display, in start order."""
+        origin = self.spans[0]["start"] if self.spans else 0
+        return [
+            {
+                "kind": span["kind"],
+                "name": span["name"],
+                "offset_s": round(span["start"] - origin, 3),
+                "duration_s": round(span["end"] - span["start"], 3) if span["end"] else None,
+                "status": span["status"],
+                "tokens_est": span["attributes"].get("prompt_tokens_est", 0) + span["attributes"].get("completion_tokens_est", 0),
+                "input_tokens_est": span["attributes"].get("prompt_tokens_est"),
+                "full_profile_input_est": span["attributes"].get("full_profile_prompt_tokens_est"),
+                "prefix": span["attributes"].get("prefix")
+            }
+            for span in self.spans
+        ]
+
+    def to_otel(self) -> Dict:
+        """Exports the spans in OpenTelemetry's OTLP/JSON shape."""
+        def attributes(attrs: Dict) -> List[Dict]:
+            out = []
+            for key, value in attrs.items():
+                if isinstance(value, bool):
+                    out.append({"key": key, "value": {"boolValue": value}})
+                elif isinstance(value, int):
+                    out.append({"key": key, "value": {"intValue": str(value)}})
+                elif isinstance(value, float):
+                    out.append({"key": key, "value": {"doubleValue": value}})
+                else:
+                    out.append({"key": key, "value": {"stringValue": str(value)}})
+            return out
+
+        spans = [
+            {
+                "traceId": self.trace_id,
+                "spanId": span["span_id"],
+                "parentSpanId": span["parent_id"] or "",
+                "name": f"{span['kind']} {span['name']}",
+                "kind": 1,
+                "startTimeUnixNano": str(int(span["start"] * 1e9)),
+                "endTimeUnixNano": str(int((span["end"] or span["start"]) * 1e9)),
+                "status": {"code": 1 if span["status"] == "ok" else 2},
+                "attributes": attributes({"crew.span_kind": span["kind"], **span["attributes"]})
+            }
+            for span in self.spans
+        ]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": attributes({"service.name": "crewai-cerebras", "run.id": self.run_id})},
+                "scopeSpans": [{"scope": {"name": "instrumentation"}, "spans": spans}]
+            }]
+        }
+
+    def save(self, directory: str = os.path.join(CACHE_DIR, "traces")) -> str:
+        """Writes the OTLP/JSON export to disk and returns its path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_otel(), f)
+        return path
+
+
+def _trace() -> Optional[RunTrace]:
+    job = jobs.current_job.get()
+    return getattr(job, "trace", None)
+
+
+@crewai_event_bus.on(TaskStartedEvent)
+def _on_task_started(source, event: TaskStartedEvent) -> None:
+    trace = _trace()
+    if trace is not None:
+        trace.start("task", getattr(event.task, "name", None) or "task")
+
+
+@crewai_event_bus.on(TaskCompletedEvent)
+def _on_task_completed(source, event: TaskCompletedEvent) -> None:
+    trace = _trace()
+    if trace is not None:
+        trace.end("task")
+
+
+@crewai_event_bus.on(TaskFailedEvent)
+def _on_task_failed(source, event: TaskFailedEvent) -> None:
+    trace = _trace()
+    if trace is not None:
+        trace.end("task", status="error", error=str(event.error))
+
+
+@crewai_event_bus.on(LLMCallStartedEvent)
+def _on_llm_call_started(source, event: LLMCallStartedEvent) -> None:
+    trace = _trace()
+    if trace is not None:
+        prompt_tokens = estimate_tokens(event.messages)
+        trace.start(
+            "llm",
+            getattr(source, "model", "llm"),
+            prompt_tokens_est=prompt_tokens,
+            # What the same call would have cost with the full prompt profile
+            full_profile_prompt_tokens_est=prompt_tokens + extra_chars_under_full(event.messages) // 4,
+            prefix=prefix_id(event.messages) or ""
+        )
+
+
+@crewai_event_bus.on(LLMCallCompletedEvent)
+def _on_llm_call_completed(source, event: LLMCallCompletedEvent) -> None:
+    trace = _trace()
+    if trace is not None:
+        trace.end("llm", completion_tokens_est=estimate_tokens(event.response))
+
+
+@crewai_event_bus.on(LLMCallFailedEvent)
+def _on_llm_call_failed(source, event: LLMCallFailedEvent) -> None:
+    trace = _trace()
+    if trace is not None:
+        trace.end("llm", status="error", error=event.error)
+
+
+@crewai_event_bus.on(ToolUsageStartedEvent)
+def _on_tool_started(source, event: ToolUsageStartedEvent) -> None:
+    trace = _trace()
+    if trace is not None:
+        trace.start("tool", event.tool_name, args=json.dumps(event.tool_args, default=str)[:200])
+
+
+@crewai_event_bus.on(ToolUsageFinishedEvent)
+def _on_tool_finished(source, event: ToolUsageFinishedEvent) -> None:
+    trace = _trace()
+    if trace is not None:
+        trace.end("tool", from_cache=event.from_cache)
+
+
+@crewai_event_bus.on(ToolUsageErrorEvent)
+def _on_tool_error(source, event: ToolUsageErrorEvent) -> None:
+    trace = _trace()
+    if trace is not None:
+        trace.end("tool", status="error", error=str(event.error))
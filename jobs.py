@@ -0,0 +1,420 @@
+import contextvars
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from config import WORKER_POOL
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+# The job being executed by the current worker, so event handlers that only
+# see a (shared) LLM instance can find out which run they belong to.
+current_job: contextvars.ContextVar = contextvars.ContextVar("current_job", default=None)
+
+
+class QueueFullError(Exception):
+    """Raised by submit when a user already has the maximum number of unfinished jobs."""
+
+
+class RunCancelled(Exception):
+    """Raised inside a run once its job is cancelled or out of time or tokens."""
+
+
+class Job:
+    """State of one background crew run, updated from CrewAI callbacks."""
+
+    def __init__(self, job_id: str, owner: Optional[str] = None):
+        self.id = job_id
+        self.owner = owner
+        self.status = QUEUED
+        self.phase = "Queued"
+        self.total_tasks = 1
+        self.tasks_done = 0
+        self.steps = 0
+        self.stream_chunks: List[str] = []
+        self._stream_chars = 0
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.metadata: Dict[str, Any] = {}
+        self.trace = None
+        self.evidence = None
+        # Limits from TASK_TYPES[...]["budget"]; a batch row's job also obeys its batch's job
+        self.budget: Dict[str, Optional[float]] = {}
+        self.parent: Optional["Job"] = None
+        self.tokens_used = 0
+        self.cancel_reason: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Whether one of the job's nested crews is using the job's own run slot
+        self._slot_busy = False
+        # What the job's calls hold open (its HTTP connections), closed when it stops
+        self._resources: "weakref.WeakSet" = weakref.WeakSet()
+        self._finished = threading.Event()
+        self._tokens_lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the job finishes; returns False on timeout."""
+        return self._finished.wait(timeout)
+
+    @property
+    def progress(self) -> float:
+        """Fraction of work completed, between 0 and 1.
+
+        Finished tasks count fully; the running task creeps towards (but
+        never reaches) its share as agent steps come in, since the number of
+        steps an agent takes is not known up front.
+        """
+        if self.status == DONE:
+            return 1.0
+        current = 0.9 * (1 - 0.6 ** self.steps)
+        return min((self.tasks_done + current) / max(self.total_tasks, 1), 0.99)
+
+    @property
+    def streamed_answer(self) -> str:
+        """Final answer text streamed so far by the current LLM call, if any."""
+        text = "".join(self.stream_chunks)
+        _, marker, answer = text.partition(FINAL_ANSWER_MARKER)
+        return answer.lstrip() if marker else ""
+
+    def start_stream(self) -> None:
+        """Starts collecting chunks for a new LLM call."""
+        self.stream_chunks = []
+        self._stream_chars = 0
+
+    def append_chunk(self, chunk: str) -> None:
+        self.stream_chunks.append(chunk)
+        self._stream_chars += len(chunk)
+        limit = WORKER_POOL["max_stream_chars"]
+        if self._stream_chars > limit:
+            # Keep the marker so streamed_answer still finds the answer, and its tail
+            text = "".join(self.stream_chunks)
+            _, marker, answer = text.partition(FINAL_ANSWER_MARKER)
+            text = f"{marker} …{answer[-limit:]}" if marker else text[-limit:]
+            self.stream_chunks = [text]
+            self._stream_chars = len(text)
+
+    def cancel(self, reason: str = "Cancelled by user") -> None:
+        """Asks the run to stop; it does so at its next LLM or search call, or while waiting on one.
+
+        The job's open connections are shut down, so requests still waiting
+        for an answer fail at once and their helper threads are freed too.
+        """
+        if not self.done and self.cancel_reason is None:
+            self.cancel_reason = reason
+            self.release()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether this job or its batch has been asked to stop."""
+        return self.cancel_reason is not None or (self.parent is not None and self.parent.cancelled)
+
+    def track(self, resource) -> None:
+        """Registers resource (e.g. the job's HTTP connections) to be closed when this job or its batch stops.
+
+        resource.close() is called on cancel, and by release() once the job is finished.
+        """
+        self._resources.add(resource)
+        if self.parent is not None:
+            self.parent.track(resource)
+        if self.cancelled:
+            resource.close()
+
+    def release(self) -> None:
+        """Closes every resource tracked by the job."""
+        for resource in list(self._resources):
+            try:
+                resource.close()
+            except Exception:
+                pass
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """When the job (or its batch) runs out of time, as a time.time() value; None without a time limit."""
+        deadlines = [self.parent.deadline] if self.parent is not None else []
+        max_seconds = self.budget.get("max_seconds")
+        if max_seconds and self.started_at:
+            deadlines.append(self.started_at + max_seconds)
+        return min((d for d in deadlines if d is not None), default=None)
+
+    def add_tokens(self, tokens: int) -> None:
+        with self._tokens_lock:
+            self.tokens_used += tokens
+        if self.parent is not None:
+            self.parent.add_tokens(tokens)
+
+    def check(self) -> None:
+        """Raises RunCancelled if the job was cancelled or has used up its budget."""
+        if self.parent is not None:
+            self.parent.check()
+        if self.cancel_reason is None:
+            max_seconds, max_tokens = self.budget.get("max_seconds"), self.budget.get("max_tokens")
+            if max_seconds and self.started_at and time.time() - self.started_at > max_seconds:
+                self.cancel(f"Stopped after reaching the {max_seconds:g}s time limit")
+            elif max_tokens and self.tokens_used > max_tokens:
+                self.cancel(f"Stopped after reaching the limit of {max_tokens} tokens")
+        if self.cancel_reason is not None:
+            raise RunCancelled(self.cancel_reason)
+
+    def on_step(self, step) -> None:
+        """Crew step_callback: records one agent iteration."""
+        self.steps += 1
+        tool = getattr(step, "tool", None)
+        action = f"using {tool}" if tool else "thinking"
+        self.phase = f"Task {self.tasks_done + 1}/{self.total_tasks}: step {self.steps}, {action}"
+
+    def on_task_done(self, output) -> None:
+        """Crew task_callback: records a finished task."""
+        self.tasks_done += 1
+        self.steps = 0
+        self.phase = f"Task {self.tasks_done}/{self.total_tasks} complete"
+
+
+_lock = threading.Lock()
+# Signalled whenever a run slot is given back
+_slot_freed = threading.Condition(_lock)
+_jobs: Dict[str, Job] = {}
+_executor = ThreadPoolExecutor(
+    max_workers=WORKER_POOL["max_workers"],
+    thread_name_prefix="crew-worker"
+)
+# Runs the blocking LLM and search calls of jobs, so a cancelled job need not wait for them
+_call_pool = ThreadPoolExecutor(max_workers=WORKER_POOL["max_workers"] * 8, thread_name_prefix="crew-call")
+# Jobs waiting for a worker, one queue per owner; owners take turns in insertion order
+_queues: "OrderedDict[Optional[str], Deque[tuple]]" = OrderedDict()
+# Run slots in use: running jobs plus slots borrowed by their nested crews; never above max_workers
+_active = 0
+# Running jobs per owner
+_running: Dict[Optional[str], int] = {}
+
+
+def _next_owner(queues, running) -> Optional[str]:
+    """The waiting owner with the fewest running jobs; ties go to whoever has waited longest for a turn."""
+    # min() keeps the first of equal owners, and _queues is in turn order
+    return min(queues, key=lambda owner: running.get(owner, 0))
+
+
+def _dispatch() -> None:
+    """Starts queued jobs while workers are free, fairly across owners. Caller holds _lock."""
+    global _active
+    while _queues and _active < WORKER_POOL["max_workers"]:
+        owner = _next_owner(_queues, _running)
+        queue = _queues.pop(owner)
+        entry = queue.popleft()
+        if queue:
+            # Back of the line until every other waiting owner has had a turn
+            _queues[owner] = queue
+        _active += 1
+        _running[owner] = _running.get(owner, 0) + 1
+        _executor.submit(*entry)
+
+
+def _run(job: Job, fn: Callable, args, kwargs) -> None:
+    global _active
+    job.status = RUNNING
+    job.phase = "Starting crew"
+    job.started_at = time.time()
+    current_job.set(job)
+    try:
+        job.check()
+        result = fn(job, *args, **kwargs)
+        limit = WORKER_POOL["max_result_chars"]
+        if result is not None and len(result) > limit:
+            # The full text is still in the result cache and run history
+            result = result[:limit] + "\n\n… (truncated for display)"
+            job.metadata["truncated"] = True
+        job.result = result
+        job.status = DONE
+        job.phase = "Complete"
+    except Exception as e:
+        # CrewAI may wrap RunCancelled, so the job's own flag decides
+        if job.cancel_reason is not None:
+            job.error = job.cancel_reason
+            job.status = CANCELLED
+            job.phase = "Cancelled"
+        else:
+            job.error = str(e)
+            job.status = FAILED
+            job.phase = "Failed"
+    finally:
+        current_job.set(None)
+        job.release()
+        job.finished_at = time.time()
+        job._finished.set()
+        with _lock:
+            _active -= 1
+            _running[job.owner] -= 1
+            if not _running[job.owner]:
+                del _running[job.owner]
+            _dispatch()
+            _slot_freed.notify_all()
+
+
+@contextmanager
+def crew_slot(job: Job):
+    """Holds a run slot while one of job's nested crews runs (a batch row, a repository file, a sub-question).
+
+    One nested crew at a time uses the slot the job itself holds; others
+    borrow a free slot, but only while no queued run is waiting for one.
+    So the crews running across all jobs never exceed max_workers, queued
+    runs start before extra nested crews do, and a job can always finish
+    its nested crews one by one. Waiting stops if the job is cancelled.
+    """
+    global _active
+    borrowed = None
+    while borrowed is None:
+        job.check()
+        with _slot_freed:
+            if not job._slot_busy:
+                job._slot_busy = True
+                borrowed = False
+            elif not _queues and _active < WORKER_POOL["max_workers"]:
+                _active += 1
+                borrowed = True
+            else:
+                _slot_freed.wait(WORKER_POOL["poll_seconds"])
+    try:
+        yield
+    finally:
+        with _slot_freed:
+            if borrowed:
+                _active -= 1
+                _dispatch()
+            else:
+                job._slot_busy = False
+            _slot_freed.notify_all()
+
+
+def _prune() -> None:
+    cutoff = time.time() - WORKER_POOL["retain_seconds"]
+    kept: Dict[Optional[str], int] = {}
+    for job in sorted(_jobs.values(), key=lambda j: j.created_at, reverse=True):
+        if not job.done:
+            continue
+        kept[job.owner] = kept.get(job.owner, 0) + 1
+        if job.finished_at < cutoff or (job.owner is not None and kept[job.owner] > WORKER_POOL["max_retained_per_user"]):
+            del _jobs[job.id]
+
+
+def submit(fn: Callable, *args, metadata: Optional[Dict] = None, owner: Optional[str] = None,
+           budget: Optional[Dict] = None, **kwargs) -> Job:
+    """Queues fn(job, *args, **kwargs) for the worker pool and returns its job.
+
+    The return value of fn becomes job.result; an exception marks the job as
+    failed with its message in job.error. Jobs of different owners are
+    started in turn, so one user's burst cannot hold back everyone else;
+    QueueFullError is raised when owner already has too many unfinished jobs.
+    budget ({"max_seconds", "max_tokens"}) bounds the run once it starts.
+    """
+    job = Job(uuid.uuid4().hex[:12], owner)
+    job.metadata.update(metadata or {})
+    job.budget = dict(budget or {})
+    with _lock:
+        _prune()
+        if owner is not None:
+            pending = sum(1 for j in _jobs.values() if j.owner == owner and not j.done)
+            if pending >= WORKER_POOL["max_pending_per_user"]:
+                raise QueueFullError(
+                    f"You already have {pending} runs queued or running; wait for one to finish."
+                )
+        _jobs[job.id] = job
+        _queues.setdefault(owner, deque()).append((_run, job, fn, args, kwargs))
+        _dispatch()
+    return job
+
+
+def queue_position(job: Job) -> Optional[int]:
+    """1-based place of a queued job in the start order, or None once it has started.
+
+    The order is the one _dispatch would follow if no running job finished
+    first, so it can still change as runs finish.
+    """
+    with _lock:
+        queues = OrderedDict((owner, deque(entry[1] for entry in queue)) for owner, queue in _queues.items())
+        running = dict(_running)
+    position = 0
+    while queues:
+        owner = _next_owner(queues, running)
+        queue = queues.pop(owner)
+        position += 1
+        if queue.popleft() is job:
+            return position
+        if queue:
+            queues[owner] = queue
+        running[owner] = running.get(owner, 0) + 1
+    return None
+
+
+def cancel(job: Job, reason: str = "Cancelled by user") -> None:
+    """Cancels a job; one still waiting in the queue is finished on the spot."""
+    with _lock:
+        for owner, queue in list(_queues.items()):
+            for entry in queue:
+                if entry[1] is job:
+                    queue.remove(entry)
+                    if not queue:
+                        del _queues[owner]
+                    job.error = reason
+                    job.status = CANCELLED
+                    job.phase = "Cancelled"
+                    job.finished_at = time.time()
+                    job._finished.set()
+                    return
+    job.cancel(reason)
+
+
+def interruptible(fn: Callable, *args, **kwargs):
+    """Calls fn(*args, **kwargs) on a helper thread while the current job waits for it.
+
+    Cancelling the job (or running out of budget) raises RunCancelled here
+    within poll_seconds, releasing the worker. The call's HTTP requests go
+    through the job's own connections in http_pool, which cancelling shuts
+    down, so the helper thread is freed soon after.
+    """
+    job = current_job.get()
+    if job is None:
+        return fn(*args, **kwargs)
+    job.check()
+    future = _call_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    while not wait([future], timeout=WORKER_POOL["poll_seconds"]).done:
+        job.check()
+    # A call cut off by the cancel itself can finish first
+    job.check()
+    return future.result()
+
+
+def completed(result: str, metadata: Optional[Dict] = None, owner: Optional[str] = None) -> Job:
+    """Registers an already finished job, e.g. for a result cache hit."""
+    job = Job(uuid.uuid4().hex[:12], owner)
+    job.result = result
+    job.metadata = dict(metadata or {})
+    job.status = DONE
+    job.phase = "Complete"
+    job.finished_at = time.time()
+    job._finished.set()
+    with _lock:
+        _prune()
+        _jobs[job.id] = job
+    return job
+
+
+def get_job(job_id: Optional[str]) -> Optional[Job]:
+    """Returns the job with this id, or None if unknown or expired."""
+    if not job_id:
+        return None
+    return _jobs.get(job_id)
@@ -0,0 +1,96 @@
+import asyncio
+import re
+from typing import List
+
+from crewai import Crew, Process, Task
+
+import jobs
+from agents import get_researcher, get_synthesizer
+from config import LOGGING, OUTPUT_FORMATS, PARALLEL_RESEARCH
+
+_LIST_PREFIX = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def plan_subquestions(llm, goal: str, max_questions: int) -> List[str]:
+    """Asks the model to split a research goal into distinct sub-questions."""
+    response = llm.call([{
+        "role": "user",
+        "content": (
+            f"Split this research goal into at most {max_questions} distinct, non-overlapping "
+            f"sub-questions that together cover it. Reply with one sub-question per line and nothing else.\n\n"
+            f"Goal: {goal}"
+        )
+    }])
+    questions: List[str] = []
+    for line in str(response).splitlines():
+        question = _LIST_PREFIX.sub("", line).strip()
+        if question and question not in questions:
+            questions.append(question)
+    return questions[:max_questions] or [goal]
+
+
+def _researcher_crew(job, goal: str, question: str, llm, tools: List) -> Crew:
+    agent = get_researcher(llm, tools, topic=goal)
+    task = Task(
+        description=f"As part of researching \"{goal}\", answer this sub-question:\n{question}",
+        expected_output="Concise findings for the sub-question: key facts, figures and where they come from",
+        agent=agent
+    )
+    return Crew(
+        agents=[agent],
+        tasks=[task],
+        process=Process.sequential,
+        verbose=LOGGING["verbose"],
+        step_callback=job.on_step,
+        task_callback=job.on_task_done
+    )
+
+
+def _kickoff_in_slot(job, crew: Crew):
+    with jobs.crew_slot(job):
+        return crew.kickoff()
+
+
+async def _kickoff_all(job, crews: List[Crew]):
+    # to_thread runs each crew on its own thread with a copy of the current
+    # context, so event handlers still see jobs.current_job
+    return await asyncio.gather(*(asyncio.to_thread(_kickoff_in_slot, job, crew) for crew in crews))
+
+
+def run(job, goal: str, output_format: str, llm, tools: List):
+    """Plans sub-questions, researches them concurrently and synthesizes the report.
+
+    Returns the synthesizer's CrewOutput with the token usage of the
+    researcher crews added in.
+    """
+    job.phase = "Planning sub-questions"
+    questions = plan_subquestions(llm, goal, PARALLEL_RESEARCH["max_subquestions"])
+    job.metadata["subquestions"] = questions
+    job.total_tasks = len(questions) + 1
+
+    # Map: one single-researcher crew per sub-question
+    findings = asyncio.run(_kickoff_all(job, [_researcher_crew(job, goal, q, llm, tools) for q in questions]))
+
+    # Reduce: one synthesizer over all the findings
+    agent = get_synthesizer(llm)
+    sections = "\n\n".join(f"### {q}\n{finding.raw}" for q, finding in zip(questions, findings))
+    synthesis = Crew(
+        agents=[agent],
+        tasks=[Task(
+            description=(
+                f"Research goal: {goal}\n\nFindings from researchers working on its sub-questions:\n\n{sections}\n\n"
+                f"Write the final report for the goal from these findings, merging overlaps and noting contradictions."
+            ),
+            expected_output=f"{OUTPUT_FORMATS[output_format]['name']}",
+            agent=agent
+        )],
+        process=Process.sequential,
+        verbose=LOGGING["verbose"],
+        step_callback=job.on_step,
+        task_callback=job.on_task_done
+    )
+    result = synthesis.kickoff()
+    for finding in findings:
+        if finding.token_usage:
+            result.token_usage.add_usage_metrics(finding.token_usage)
+    return result
@@ -0,0 +1,104 @@
+import threading
+from typing import Dict, Iterable
+
+from config import MODELS
+
+# Agent personas per prompt profile. CrewAI puts role, backstory and goal at
+# the top of every system prompt, so they are fixed strings: nothing about
+# the run (goal, topic, date) goes in, keeping the prefix byte-identical
+# across calls and runs for provider-side prompt caching.
+PERSONAS = {
+    "research_analyst": {
+        "full": {
+            "role": "Research Analyst",
+            "goal": "Conduct comprehensive research and analysis on emerging trends and developments",
+            "backstory": (
+                "Expert research analyst with deep expertise in analyzing market trends, technological developments, "
+                "and industry patterns. Skilled at synthesizing complex information from multiple sources to provide "
+                "actionable insights."
+            )
+        },
+        "compact": {
+            "role": "Research Analyst",
+            "goal": "Research the task and report key findings",
+            "backstory": "Concise analyst who cites sources."
+        }
+    },
+    "researcher": {
+        "full": {
+            "role": "Research Specialist",
+            "goal": "Analyze trends and provide concise insights",
+            "backstory": "Expert researcher specializing in trend analysis and clear reporting"
+        },
+        "compact": {
+            "role": "Research Specialist",
+            "goal": "Answer the sub-question concisely",
+            "backstory": "Trend researcher."
+        }
+    },
+    "code_analyst": {
+        "full": {
+            "role": "Python Code Analyst",
+            "goal": "Analyze Python code for quality, structure, and best practices",
+            "backstory": "Expert Python developer specializing in code analysis, optimization, and best practices"
+        },
+        "compact": {
+            "role": "Python Code Analyst",
+            "goal": "Review Python code quality",
+            "backstory": "Senior Python reviewer."
+        }
+    },
+    "synthesizer": {
+        "full": {
+            "role": "Research Synthesizer",
+            "goal": "Combine findings from several researchers into one coherent, non-repetitive report",
+            "backstory": (
+                "Senior editor who reconciles overlapping research, resolves contradictions and keeps only what "
+                "supports the goal"
+            )
+        },
+        "compact": {
+            "role": "Research Synthesizer",
+            "goal": "Merge findings into one non-repetitive report",
+            "backstory": "Editor who resolves overlaps and contradictions."
+        }
+    }
+}
+
+_lock = threading.Lock()
+# Compact text -> characters its full-profile counterpart adds
+_savings: Dict[str, int] = {}
+
+
+def profile_for(model_name: str) -> str:
+    """Prompt profile configured for a model in config.MODELS."""
+    return MODELS.get(model_name, {}).get("prompt_profile", "full")
+
+
+def persona(kind: str, model_name: str) -> Dict[str, str]:
+    """Role, goal and backstory of an agent under the model's prompt profile."""
+    return PERSONAS[kind][profile_for(model_name)]
+
+
+def register_compaction(compact: str, full: str) -> None:
+    """Records a compact text (e.g. a tool description) and the full one it replaces."""
+    if compact != full:
+        with _lock:
+            _savings[compact] = len(full) - len(compact)
+
+
+def extra_chars_under_full(messages: Iterable) -> int:
+    """Characters the full profile would have added to a prompt written with compact texts."""
+    system = "".join(
+        str(m.get("content", "")) for m in messages
+        if isinstance(m, dict) and m.get("role") == "system"
+    )
+    if not system:
+        return 0
+    with _lock:
+        return sum(extra for compact, extra in _savings.items() if compact in system)
+
+
+for _profiles in PERSONAS.values():
+    for _field, _text in _profiles["compact"].items():
+        register_compaction(_text, _profiles["full"][_field])
@@ -0,0 +1,247 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, TypeVar
+
+import jobs
+from config import CACHE_DIR, RATE_LIMITS
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_RETRYABLE_ERRORS = {
+    "RateLimitError",
+    "Timeout",
+    "TimeoutError",
+    "APITimeoutError",
+    "APIConnectionError",
+    "ServiceUnavailableError",
+    "InternalServerError",
+    # httpx errors from the shared connection pool, e.g. a keep-alive connection the server already closed
+    "ConnectError",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "PoolTimeout",
+    "RemoteProtocolError",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+"""
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an error is the provider saying "slow down" (HTTP 429)."""
+    text = str(error).lower()
+    return _status_code(error) == 429 or type(error).__name__ == "RateLimitError" or "429" in text or "rate limit" in text
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is a rate limit, timeout or provider outage worth retrying or routing around."""
+    if is_rate_limited(error) or _status_code(error) in _RETRYABLE_STATUS:
+        return True
+    return type(error).__name__ in _RETRYABLE_ERRORS or "timed out" in str(error).lower()
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from the error's Retry-After header, when the provider sent one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class MemoryStore:
+    """Bucket state shared by every thread in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, Dict] = {}
+
+    def update(self, name: str, fn: Callable[[Dict], T]) -> T:
+        """Runs fn on the bucket's state dict atomically; fn updates it in place."""
+        with self._lock:
+            state = self._states.setdefault(name, {})
+            return fn(state)
+
+
+class SqliteStore:
+    """Bucket state shared by every process using the same database file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def update(self, name: str, fn: Callable[[Dict], T]) -> T:
+        with self._connect() as conn:
+            # Takes the write lock up front so concurrent read-modify-writes serialize
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT state FROM buckets WHERE name = ?", (name,)).fetchone()
+                state = json.loads(row[0]) if row else {}
+                result = fn(state)
+                conn.execute(
+                    "INSERT INTO buckets (name, state) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET state = excluded.state",
+                    (name, json.dumps(state))
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return result
+
+
+class AdaptiveRateLimiter:
+    """Token buckets for requests and tokens per minute that slow down after 429s.
+
+    acquire() reserves capacity up front and sleeps until the reservation
+    is covered, so waiting callers are served in arrival order with a
+    predictable delay rather than all retrying at once. A 429 halves the
+    allowed rate (down to min_rate_fraction) and pauses the bucket for the
+    provider's Retry-After; each success restores part of the rate.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: Optional[float], store):
+        self.name = name
+        self.limits = {"requests": requests_per_minute}
+        if tokens_per_minute:
+            self.limits["tokens"] = tokens_per_minute
+        self.store = store
+
+    def _refill(self, state: Dict, now: float) -> None:
+        scale = state.setdefault("scale", 1.0)
+        elapsed = max(now - state.get("updated", now), 0.0)
+        for kind, per_minute in self.limits.items():
+            capacity = per_minute * RATE_LIMITS["burst_seconds"] / 60
+            available = state.get(kind, capacity) + elapsed * per_minute * scale / 60
+            state[kind] = min(available, capacity)
+        state["updated"] = now
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Blocks until one request (and this many tokens) may be sent; returns the seconds waited."""
+        amounts = {"requests": 1, "tokens": tokens}
+
+        def reserve(state: Dict) -> float:
+            now = time.time()
+            self._refill(state, now)
+            wait = max(state.get("paused_until", 0.0) - now, 0.0)
+            for kind, per_minute in self.limits.items():
+                capacity = per_minute * RATE_LIMITS["burst_seconds"] / 60
+                state[kind] -= min(amounts[kind], capacity)
+                if state[kind] < 0:
+                    wait = max(wait, -state[kind] / (per_minute * state["scale"] / 60))
+            return wait
+
+        wait = self.store.update(self.name, reserve)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record_success(self) -> None:
+        def recover(state: Dict) -> None:
+            state["scale"] = min(state.get("scale", 1.0) + RATE_LIMITS["recovery_per_success"], 1.0)
+
+        self.store.update(self.name, recover)
+
+    def record_throttle(self, pause_seconds: float) -> None:
+        """Slows the bucket down after a 429 and pauses it for pause_seconds."""
+        def throttle(state: Dict) -> None:
+            state["scale"] = max(state.get("scale", 1.0) / 2, RATE_LIMITS["min_rate_fraction"])
+            state["paused_until"] = max(state.get("paused_until", 0.0), time.time() + pause_seconds)
+
+        self.store.update(self.name, throttle)
+
+    def is_paused(self) -> bool:
+        return self.store.update(self.name, lambda state: state.get("paused_until", 0.0) > time.time())
+
+
+def call_with_retries(limiter: Optional[AdaptiveRateLimiter], fn: Callable[[], T], tokens: int = 0,
+                      max_retries: Optional[int] = None) -> T:
+    """Calls fn through the limiter, retrying rate limits and transient errors with jittered backoff.
+
+    Gives up with jobs.RunCancelled before each attempt once the current job is cancelled.
+    """
+    if max_retries is None:
+        max_retries = RATE_LIMITS["max_retries"]
+    job = jobs.current_job.get()
+    for attempt in range(max_retries + 1):
+        if job is not None:
+            job.check()
+        if limiter is not None:
+            limiter.acquire(tokens)
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            backoff = min(RATE_LIMITS["backoff_base_seconds"] * 2 ** attempt, RATE_LIMITS["backoff_max_seconds"])
+            if limiter is not None and is_rate_limited(e):
+                limiter.record_throttle(retry_after(e) or backoff)
+            if attempt == max_retries:
+                raise
+            # Full jitter keeps callers throttled together from retrying in lockstep
+            time.sleep(random.uniform(0, backoff))
+            continue
+        if limiter is not None:
+            limiter.record_success()
+        return result
+
+
+_lock = threading.Lock()
+_store = None
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+
+
+def _get_store():
+    global _store
+    if _store is None:
+        if RATE_LIMITS["backend"] == "sqlite":
+            _store = SqliteStore(os.path.join(CACHE_DIR, "ratelimits.sqlite3"))
+        else:
+            _store = MemoryStore()
+    return _store
+
+
+def get_limiter(name: str) -> Optional[AdaptiveRateLimiter]:
+    """Returns the shared limiter for a model or tool in config.RATE_LIMITS, or None if it is unlimited."""
+    limits = RATE_LIMITS["limits"].get(name)
+    if limits is None:
+        return None
+    with _lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(
+                name,
+                limits["requests_per_minute"],
+                limits.get("tokens_per_minute"),
+                _get_store()
+            )
+            _limiters[name] = limiter
+        return limiter
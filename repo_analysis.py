@@ -0,0 +1,322 @@
+import contextvars
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from crewai import Crew, Process, Task
+
+import code_prepass
+from agents import get_code_analyst
+from config import CACHE_DIR, CODE_PREPASS, LOGGING, REPO_ANALYSIS
+from instrumentation import estimate_tokens
+
+_SKIP_DIRS = {
+    "__pycache__", "venv", "env", "node_modules", "site-packages", "build", "dist", "__MACOSX",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_reviews (
+    model TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    review TEXT NOT NULL,
+    reviewed_at REAL NOT NULL,
+    PRIMARY KEY (model, sha256)
+);
+CREATE TABLE IF NOT EXISTS project_manifests (
+    owner TEXT NOT NULL,
+    project TEXT NOT NULL,
+    path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (owner, project, path)
+);
+"""
+
+
+def _wanted(path: str) -> bool:
+    """Python files outside VCS, virtualenv, cache and build directories."""
+    *dirs, name = path.split("/")
+    return name.endswith(".py") and not any(d in _SKIP_DIRS or d.startswith(".") for d in dirs)
+
+
+def _add_file(files: Dict[str, str], path: str, data: bytes) -> None:
+    if len(files) >= REPO_ANALYSIS["max_files"]:
+        raise ValueError(f"More than {REPO_ANALYSIS['max_files']} Python files; analyze a smaller part of the tree")
+    files[path] = data.decode("utf-8", errors="replace")
+
+
+def collect_from_zip(data: bytes) -> Dict[str, str]:
+    """Python sources of a zip archive by relative path, without a single top-level folder."""
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise ValueError("Not a zip archive")
+    members = [
+        m for m in archive.infolist()
+        if not m.is_dir() and _wanted(m.filename) and m.file_size <= REPO_ANALYSIS["max_file_bytes"]
+    ]
+    # GitHub-style archives wrap everything in "<repo>-<branch>/"
+    tops = {m.filename.split("/", 1)[0] for m in members}
+    strip = len(tops) == 1 and all("/" in m.filename for m in members)
+    files: Dict[str, str] = {}
+    for member in sorted(members, key=lambda m: m.filename):
+        path = member.filename.split("/", 1)[1] if strip else member.filename
+        _add_file(files, path, archive.read(member))
+    return files
+
+
+def collect_from_directory(root: str) -> Dict[str, str]:
+    """Python sources under a local directory, by path relative to it."""
+    if not os.path.isdir(root):
+        raise ValueError(f"Not a directory: {root}")
+    files: Dict[str, str] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in _SKIP_DIRS and not d.startswith("."))
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            relative = os.path.relpath(path, root).replace(os.sep, "/")
+            if _wanted(relative) and os.path.getsize(path) <= REPO_ANALYSIS["max_file_bytes"]:
+                with open(path, "rb") as f:
+                    _add_file(files, relative, f.read())
+    return files
+
+
+def content_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+class FileIndex:
+    """Per-file reviews keyed by model and content hash, plus each owner's project manifests.
+
+    A file whose content was reviewed before (under any path or project) is
+    not sent to the model again; manifests only say what changed since the
+    project was last analyzed. A project is recognised by its content, not
+    its name: it is the same owner's earlier manifest sharing the most
+    paths, so two "project.zip" uploads are never confused.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def reviews(self, model_name: str, hashes: Iterable[str]) -> Dict[str, str]:
+        """Stored reviews by content hash, for the hashes that have one."""
+        hashes = list(hashes)
+        found = {}
+        with self._connect() as conn:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT sha256, review FROM file_reviews WHERE model = ? AND sha256 IN ({', '.join('?' * len(batch))})",
+                    [model_name, *batch]
+                )
+                found.update(rows.fetchall())
+        return found
+
+    def put_review(self, model_name: str, sha256: str, review: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO file_reviews VALUES (?, ?, ?, ?)",
+                (model_name, sha256, review, time.time())
+            )
+
+    def match_project(self, owner: str, manifest: Dict[str, str]) -> str:
+        """Id of the owner's earlier project with at least half of manifest's paths, or a new id."""
+        shared: Dict[str, int] = {}
+        with self._connect() as conn:
+            for project, path in conn.execute("SELECT project, path FROM project_manifests WHERE owner = ?", (owner,)):
+                if path in manifest:
+                    shared[project] = shared.get(project, 0) + 1
+        best = max(shared, key=shared.get, default=None)
+        if best is not None and shared[best] * 2 >= len(manifest):
+            return best
+        return hashlib.sha256("\n".join(sorted(manifest)).encode("utf-8")).hexdigest()[:16]
+
+    def diff(self, owner: str, project: str, manifest: Dict[str, str]) -> Dict[str, List[str]]:
+        """Paths added, changed, removed and unchanged since the project's last manifest."""
+        with self._connect() as conn:
+            previous = dict(conn.execute(
+                "SELECT path, sha256 FROM project_manifests WHERE owner = ? AND project = ?", (owner, project)
+            ))
+        return {
+            "added": sorted(p for p in manifest if p not in previous),
+            "changed": sorted(p for p in manifest if p in previous and previous[p] != manifest[p]),
+            "removed": sorted(p for p in previous if p not in manifest),
+            "unchanged": sorted(p for p in manifest if previous.get(p) == manifest[p])
+        }
+
+    def save_manifest(self, owner: str, project: str, manifest: Dict[str, str]) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM project_manifests WHERE owner = ? AND project = ?", (owner, project))
+            conn.executemany(
+                "INSERT INTO project_manifests VALUES (?, ?, ?, ?)",
+                [(owner, project, path, sha256) for path, sha256 in manifest.items()]
+            )
+
+
+_lock = threading.Lock()
+_instance: Optional[FileIndex] = None
+
+
+def get_file_index() -> FileIndex:
+    """Returns the process-wide file review index in CACHE_DIR."""
+    global _instance
+    if _instance is None:
+        with _lock:
+            if _instance is None:
+                _instance = FileIndex(os.path.join(CACHE_DIR, "repo_index.sqlite3"))
+    return _instance
+
+
+def _attention(prepass: Dict) -> int:
+    """How much a file deserves a place in the project report: findings plus excess complexity."""
+    if not prepass["ok"]:
+        return 100
+    excess = sum(max(f["complexity"] - CODE_PREPASS["complexity_warning"], 0) for f in prepass["functions"])
+    return len(prepass["findings"]) + excess
+
+
+def _overview(prepasses: Dict[str, Dict]) -> str:
+    parsed = [p for p in prepasses.values() if p["ok"]]
+    functions = [(path, f) for path, p in prepasses.items() if p["ok"] for f in p["functions"]]
+    lines = [
+        f"- {len(prepasses)} Python files, {sum(p['source_lines'] for p in parsed)} source lines, "
+        f"{len(functions)} functions, {sum(len(p['findings']) for p in parsed)} lint findings",
+    ]
+    unparsable = [path for path, p in prepasses.items() if not p["ok"]]
+    if unparsable:
+        lines.append(f"- Could not parse: {', '.join(unparsable[:10])}")
+    lines.append("- Most complex functions:")
+    for path, f in sorted(functions, key=lambda item: -item[1]["complexity"])[:CODE_PREPASS["max_listed_functions"]]:
+        lines.append(f"  - {path}:{f['line']} {f['name']} (complexity {f['complexity']}, {f['lines']} lines)")
+    return "\n".join(lines)
+
+
+def _review_digest(prepasses: Dict[str, Dict], reviews: Dict[str, str]) -> str:
+    """Per-file reviews for the project report, files needing most attention first, within the token budget."""
+    budget = REPO_ANALYSIS["aggregate_token_budget"]
+    max_chars = REPO_ANALYSIS["max_review_chars"]
+    sections, omitted, used = [], [], 0
+    for path in sorted(reviews, key=lambda p: (-_attention(prepasses[p]), p)):
+        review = reviews[path]
+        if len(review) > max_chars:
+            review = review[:max_chars].rsplit(" ", 1)[0] + "…"
+        section = f"### {path}\n{review}"
+        cost = estimate_tokens(section)
+        if used + cost > budget:
+            omitted.append(path)
+            continue
+        sections.append(section)
+        used += cost
+    if omitted:
+        sections.append(f"Also reviewed, details left out for space: {', '.join(omitted[:50])}" + (" …" if len(omitted) > 50 else ""))
+    return "\n\n".join(sections)
+
+
+def run(job, project: str, files: Dict[str, str], model_name: str, llm,
+        review_file: Callable[[str, str, Dict], object], use_index: bool = True):
+    """Reviews the changed files of a project in parallel, then writes the project-level report.
+
+    review_file(path, source, prepass) runs one file's code analysis crew and
+    returns its CrewOutput. Files whose content already has a review by this model
+    are not reviewed again. Returns the final report followed by every
+    file's review. With use_index False (e.g. while a cassette records or
+    replays) stored reviews are neither used nor updated.
+    """
+    index = get_file_index()
+    manifest = {path: content_hash(source) for path, source in files.items()}
+    owner = job.owner or ""
+    project_id = index.match_project(owner, manifest)
+    changes = index.diff(owner, project_id, manifest)
+    stored = index.reviews(model_name, set(manifest.values())) if use_index else {}
+    prepasses = {path: code_prepass.analyze(source) for path, source in files.items()}
+
+    reviews: Dict[str, str] = {path: stored[manifest[path]] for path in files if manifest[path] in stored}
+    pending = []
+    for path in sorted(files):
+        if path in reviews:
+            continue
+        prepass = prepasses[path]
+        if prepass["ok"] and prepass["source_lines"] < REPO_ANALYSIS["min_source_lines"]:
+            reviews[path] = "Too small for a model review. Local analysis:\n" + code_prepass.format_findings(prepass)
+        else:
+            pending.append(path)
+    job.metadata["repo"] = {
+        "project": project,
+        "files": len(files),
+        "reviewed": len(pending),
+        "reused": len(files) - len(pending),
+        **{kind: len(paths) for kind, paths in changes.items()}
+    }
+    job.total_tasks = len(pending) + 1
+    job.phase = f"Reviewing {len(pending)} of {len(files)} files"
+
+    usage = []
+    with ThreadPoolExecutor(max_workers=REPO_ANALYSIS["concurrency"], thread_name_prefix="repo-file") as pool:
+        # Each review runs with a copy of this context, so it still belongs to the job
+        futures = {
+            pool.submit(contextvars.copy_context().run, review_file, path, files[path], prepasses[path]): path
+            for path in pending
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                output = future.result()
+            except Exception as e:
+                if job.cancel_reason is not None:
+                    raise
+                reviews[path] = f"Review failed: {e}"
+            else:
+                reviews[path] = output.raw
+                if use_index:
+                    index.put_review(model_name, manifest[path], output.raw)
+                if output.token_usage:
+                    usage.append(output.token_usage)
+            job.on_task_done(None)
+            job.phase = f"Reviewed {job.tasks_done}/{len(pending)} files"
+
+    job.phase = "Writing the project report"
+    agent = get_code_analyst(llm)
+    report = Crew(
+        agents=[agent],
+        tasks=[Task(
+            description=(
+                f"Write a project-level code review of {project} from the local metrics and per-file reviews below. "
+                f"Cover cross-cutting themes, the most important issues with file references, and prioritized "
+                f"recommendations.\n\nProject metrics computed locally:\n{_overview(prepasses)}\n\n"
+                f"Per-file reviews:\n\n{_review_digest(prepasses, reviews)}"
+            ),
+            expected_output="Project-level code review with prioritized recommendations",
+            agent=agent
+        )],
+        process=Process.sequential,
+        verbose=LOGGING["verbose"],
+        task_callback=job.on_task_done
+    ).kickoff()
+    for token_usage in usage:
+        report.token_usage.add_usage_metrics(token_usage)
+    if use_index:
+        index.save_manifest(owner, project_id, manifest)
+
+    file_sections = "\n\n".join(f"### `{path}`\n\n{reviews[path]}" for path in sorted(reviews))
+    report.raw = f"{report.raw}\n\n---\n\n## File reviews\n\n{file_sections}"
+    return report
@@ -0,0 +1,208 @@
+import html
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+import markdown
+
+from config import REPORT_RENDER
+
+_ALLOWED_TAGS = {
+    "a", "p", "br", "hr", "h1", "h2", "h3", "h4", "h5", "h6", "strong", "em", "b", "i", "del", "sup", "sub",
+    "code", "pre", "blockquote", "ul", "ol", "li", "table", "thead", "tbody", "tr", "th", "td",
+}
+_VOID_TAGS = {"br", "hr"}
+_ALLOWED_ATTRS = {"a": {"href", "title"}, "code": {"class"}, "th": {"align"}, "td": {"align"}, "ol": {"start"}}
+# Elements dropped together with their content; other unknown tags are dropped but keep their text
+_DROPPED_TAGS = {"script", "style", "iframe", "object", "embed", "template", "noscript", "textarea", "title", "svg", "math"}
+_SAFE_URL = re.compile(r"^(https?:|mailto:|#)", re.I)
+
+_HEADING = re.compile(r"^#{1,2}\s+(.+?)[\s#]*$")
+_FENCE = re.compile(r"^\s{0,3}(```|~~~)")
+
+
+class _Sanitizer(HTMLParser):
+    """Re-emits HTML keeping only allowlisted tags and attributes, with every opened tag closed."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out: List[str] = []
+        self.open: List[str] = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _DROPPED_TAGS:
+            self.dropping += 1
+        if self.dropping or tag not in _ALLOWED_TAGS:
+            return
+        kept = []
+        for name, value in attrs:
+            if name not in _ALLOWED_ATTRS.get(tag, ()) or value is None:
+                continue
+            if name == "href" and not _SAFE_URL.match(value.strip()):
+                continue
+            kept.append(f' {name}="{html.escape(value)}"')
+        if tag == "a":
+            if not any(attr.startswith(" href=") for attr in kept):
+                # A link without a safe target is kept as plain text
+                return
+            kept.append(' target="_blank" rel="noopener noreferrer nofollow"')
+        self.out.append(f"<{tag}{''.join(kept)}>")
+        if tag not in _VOID_TAGS:
+            self.open.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in _DROPPED_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping or tag not in self.open:
+            return
+        # Close anything left open inside this element, so a stray tag cannot escape the report
+        while self.open:
+            closed = self.open.pop()
+            self.out.append(f"</{closed}>")
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.out.append(html.escape(data, quote=False))
+
+    def result(self) -> str:
+        self.close()
+        return "".join(self.out) + "".join(f"</{tag}>" for tag in reversed(self.open))
+
+
+def sanitize(fragment: str) -> str:
+    """HTML safe to insert into the page: no scripts, styles, event handlers or unsafe links."""
+    sanitizer = _Sanitizer()
+    sanitizer.feed(fragment)
+    return sanitizer.result()
+
+
+def to_html(text: str) -> str:
+    """Converts Markdown (e.g. a CrewOutput's raw text) to sanitized HTML."""
+    rendered = markdown.markdown(
+        text,
+        extensions=["fenced_code", "tables", "sane_lists"],
+        extension_configs={"tables": {"use_align_attribute": True}}
+    )
+    return sanitize(rendered)
+
+
+def _split(text: str, starts_block: Callable[[str, str], bool]) -> List[str]:
+    """Splits Markdown into blocks before each line where starts_block(line, previous) holds, never inside a code fence."""
+    blocks, current, fence, previous = [], [], None, ""
+    for line in text.splitlines():
+        marker = _FENCE.match(line)
+        if marker:
+            fence = marker.group(1) if fence is None else None if marker.group(1) == fence else fence
+        elif fence is None and current and starts_block(line, previous):
+            blocks.append("\n".join(current))
+            current = []
+        current.append(line)
+        previous = line
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def paginate(text: str, page_chars: int) -> List[str]:
+    """Groups a report's top-level sections into pages of about page_chars characters."""
+    pages, current = [], ""
+    for section in _split(text, lambda line, previous: bool(_HEADING.match(line))):
+        pieces = [section]
+        if len(section) > page_chars:
+            pieces = _split(section, lambda line, previous: not previous.strip() and bool(line.strip()))
+        for piece in pieces:
+            if current and len(current) + len(piece) > page_chars:
+                pages.append(current)
+                current = ""
+            current = f"{current}\n{piece}" if current else piece
+    if current or not pages:
+        pages.append(current)
+    return pages
+
+
+def _page_title(page: str, number: int) -> str:
+    for line in page.splitlines():
+        match = _HEADING.match(line)
+        if match:
+            return re.sub(r"[*_`]", "", match.group(1))[:80]
+    return f"Page {number}"
+
+
+def to_pdf(text: str) -> bytes:
+    """Renders a Markdown report to PDF, using REPORT_RENDER["pdf_font"] when set."""
+    # fpdf2 and its font tooling are only loaded for exports
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    body = to_html(text)
+    family = code_family = None
+    if REPORT_RENDER["pdf_font"]:
+        family = code_family = "report"
+        for style in ("", "B", "I", "BI"):
+            pdf.add_font(family, style, REPORT_RENDER["pdf_font"])
+    else:
+        # The built-in PDF fonts only cover Latin-1
+        body = body.encode("latin-1", "replace").decode("latin-1")
+    pdf.add_page()
+    pdf.write_html(body, font_family=family or "helvetica", pre_code_font=code_family or "courier")
+    return bytes(pdf.output())
+
+
+_export_pool = ThreadPoolExecutor(max_workers=REPORT_RENDER["export_workers"], thread_name_prefix="report-export")
+
+
+class RenderedReport:
+    """A finished report split into pages, each converted to sanitized HTML once, on first view."""
+
+    def __init__(self, text: str):
+        self.markdown = text
+        self.pages = paginate(text, REPORT_RENDER["page_chars"])
+        self.titles = [_page_title(page, i + 1) for i, page in enumerate(self.pages)]
+        self._html: Dict[int, str] = {}
+        self._pdf: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def page_html(self, index: int) -> str:
+        rendered = self._html.get(index)
+        if rendered is None:
+            rendered = self._html[index] = to_html(self.pages[index])
+        return rendered
+
+    @property
+    def pdf_export(self) -> Optional[Future]:
+        """The PDF export's future, or None until start_pdf is called."""
+        return self._pdf
+
+    def start_pdf(self) -> Future:
+        """Renders the PDF export on the export pool, once, off the request path."""
+        with self._lock:
+            if self._pdf is None:
+                self._pdf = _export_pool.submit(to_pdf, self.markdown)
+            return self._pdf
+
+
+_lock = threading.Lock()
+_reports: "OrderedDict[str, RenderedReport]" = OrderedDict()
+
+
+def get_report(job_id: str, text: str) -> RenderedReport:
+    """Returns the rendered report of a finished job, paginating it on first view."""
+    with _lock:
+        report = _reports.get(job_id)
+        if report is not None:
+            _reports.move_to_end(job_id)
+            return report
+    report = RenderedReport(text)
+    with _lock:
+        report = _reports.setdefault(job_id, report)
+        _reports.move_to_end(job_id)
+        while len(_reports) > REPORT_RENDER["cached_reports"]:
+            _reports.popitem(last=False)
+    return report
@@ -0,0 +1,146 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from crewai import LLM
+from crewai.utilities.events import LLMCallCompletedEvent, LLMCallStartedEvent, LLMStreamChunkEvent, crewai_event_bus
+from crewai.utilities.events.llm_events import LLMCallType
+
+import http_pool
+import jobs
+from cassette import get_cassette
+from config import CEREBRAS_BASE_URL, DEFAULT_TEMPERATURE, RATE_LIMITS, TOOLS
+from instrumentation import estimate_tokens
+from prompt_profiles import register_compaction
+from rate_limit import AdaptiveRateLimiter, call_with_retries, get_limiter
+from search_cache import CachedSerperDevTool
+
+# Module state survives Streamlit reruns (only app.py is re-executed), so every
+# session in this process shares the same clients.
+_lock = threading.Lock()
+_llms: Dict[Tuple, LLM] = {}
+_tools: Dict[Tuple[str, str], object] = {}
+http_pool.install()
+
+class RateLimitedLLM(LLM):
+    """LLM whose calls go through a shared rate limiter and are retried on 429s and timeouts.
+
+    Calls made for a job count towards its token budget and stop waiting as
+    soon as the job is cancelled. With a cassette recording, calls are
+    saved; when replaying, they are answered from the cassette with the
+    usual LLM events, without touching the network or the rate limiter.
+    """
+
+    def __init__(self, limiter: Optional[AdaptiveRateLimiter], max_retries: Optional[int] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None):
+        tokens = estimate_tokens(messages) + RATE_LIMITS["completion_tokens_estimate"]
+        cassette = get_cassette()
+        request = {"model": self.model, "messages": messages, "tools": tools}
+        if cassette.replaying:
+            crewai_event_bus.emit(self, LLMCallStartedEvent(
+                messages=messages, tools=tools, callbacks=callbacks, available_functions=available_functions
+            ))
+            result = jobs.interruptible(cassette.replay, "llm", request)
+            if self.stream:
+                crewai_event_bus.emit(self, LLMStreamChunkEvent(chunk=str(result)))
+            crewai_event_bus.emit(self, LLMCallCompletedEvent(response=result, call_type=LLMCallType.LLM_CALL))
+        else:
+            result = jobs.interruptible(cassette.through, "llm", request, lambda: call_with_retries(
+                self.limiter,
+                lambda: super(RateLimitedLLM, self).call(messages, tools, callbacks, available_functions),
+                tokens,
+                self.max_retries
+            ))
+        job = jobs.current_job.get()
+        if job is not None:
+            job.add_tokens(estimate_tokens(messages) + estimate_tokens(result))
+        return result
+
+
+TOOL_FACTORIES = {
+    "serper": lambda **kwargs: CachedSerperDevTool(api_key=os.environ[TOOLS["serper"]["api_key_env"]], **kwargs),
+}
+
+
+def get_llm(
+    model_name: str,
+    api_key: str,
+    temperature: float = DEFAULT_TEMPERATURE,
+    base_url: str = CEREBRAS_BASE_URL,
+    stream: bool = False,
+    timeout: Optional[float] = None,
+    max_retries: Optional[int] = None,
+) -> LLM:
+    """Returns the shared LLM client for these settings, building it once.
+
+    Calls to the Cerebras API share the model's rate limiter with every
+    other client of that model; max_retries overrides RATE_LIMITS.
+    """
+    key = (model_name, temperature, base_url, api_key, stream, timeout, max_retries)
+    llm = _llms.get(key)
+    if llm is None:
+        with _lock:
+            llm = _llms.get(key)
+            if llm is None:
+                llm = RateLimitedLLM(
+                    get_limiter(model_name) if base_url == CEREBRAS_BASE_URL else None,
+                    max_retries,
+                    model=model_name,
+                    api_key=api_key,
+                    base_url=base_url,
+                    temperature=temperature,
+                    stream=stream,
+                    timeout=timeout
+                )
+                _llms[key] = llm
+    return llm
+
+
+def get_tool(tool_id: str, profile: str = "full"):
+    """Returns the shared instance of a tool from config.TOOLS for a prompt profile.
+
+    Under the "compact" profile the tool carries its short description.
+    Raises KeyError when the tool's API key is not configured.
+    """
+    key = (tool_id, profile)
+    tool = _tools.get(key)
+    if tool is None:
+        with _lock:
+            tool = _tools.get(key)
+            if tool is None:
+                compact = TOOLS[tool_id].get("compact_description")
+                if profile == "compact" and compact:
+                    tool = TOOL_FACTORIES[tool_id](description=compact)
+                    register_compaction(tool.description, TOOL_FACTORIES[tool_id]().description)
+                else:
+                    tool = TOOL_FACTORIES[tool_id]()
+                _tools[key] = tool
+    return tool
+
+
+def get_tools(tool_ids: Iterable[str], profile: str = "full") -> List:
+    """Returns shared instances for a set of tool ids, in a stable order."""
+    return [get_tool(tool_id, profile) for tool_id in sorted(set(tool_ids))]
+
+
+def clear_resources(model_name: Optional[str] = None, tool_id: Optional[str] = None) -> None:
+    """Drops cached clients so the next lookup rebuilds them.
+
+    With no arguments everything is dropped; otherwise only entries for the
+    given model and/or tool.
+    """
+    with _lock:
+        if model_name is None and tool_id is None:
+            _llms.clear()
+            _tools.clear()
+            return
+        if model_name is not None:
+            for key in [k for k in _llms if k[0] == model_name]:
+                del _llms[key]
+        if tool_id is not None:
+            for key in [k for k in _tools if k[0] == tool_id]:
+                del _tools[key]
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+from config import CACHE_DIR, RESULT_CACHE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at);
+"""
+
+
+def make_key(model_name: str, task_type: str, goal: str, output_format: str, tools: Iterable[str]) -> str:
+    """Returns the content address of a crew run.
+
+    Research goals are whitespace-normalized; code is kept as-is apart from
+    surrounding blank space, since indentation is meaningful.
+    """
+    goal = goal.strip() if task_type == "code" else " ".join(goal.split())
+    payload = json.dumps(
+        [model_name, task_type, goal, output_format, sorted(set(tools))],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed store of final crew outputs with TTL and LRU eviction."""
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Returns the cached entry for key, or None if missing or expired."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result, metadata, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > self.ttl_seconds:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        return {"result": row[0], "metadata": json.loads(row[1]), "created_at": row[2]}
+
+    def put(self, key: str, result: str, metadata: Optional[Dict] = None) -> None:
+        """Stores a result and evicts least recently used entries over budget."""
+        now = time.time()
+        size = len(result.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (key, result, json.dumps(metadata or {}), size, now, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM results ORDER BY accessed_at").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    def clear(self) -> None:
+        """Removes every cached result."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+
+_lock = threading.Lock()
+_instance: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """Returns the process-wide result cache configured in config.RESULT_CACHE."""
+    global _instance
+    if _instance is None:
+        with _lock:
+            if _instance is None:
+                _instance = ResultCache(
+                    os.path.join(CACHE_DIR, "results.sqlite3"),
+                    ttl_seconds=RESULT_CACHE["ttl_seconds"],
+                    max_bytes=RESULT_CACHE["max_bytes"]
+                )
+    return _instance
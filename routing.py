@@ -0,0 +1,189 @@
+import contextvars
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from crewai import LLM
+
+from config import CEREBRAS_BASE_URL, DEFAULT_TEMPERATURE, MODELS, ROUTING
+from instrumentation import estimate_tokens
+from rate_limit import is_retryable
+from resources import get_llm
+
+# Losing racers keep running until their request returns, so they need their
+# own threads rather than the crew worker pool.
+_race_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-race")
+
+
+class CircuitBreaker:
+    """Stops routing to a model after consecutive timeouts or rate limits until a cool-down passes."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        """False while open; once the cool-down passes calls are let through again as a trial."""
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+_breakers_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(model_name: str) -> CircuitBreaker:
+    """Returns the process-wide circuit breaker for a model."""
+    with _breakers_lock:
+        breaker = _breakers.get(model_name)
+        if breaker is None:
+            breaker = CircuitBreaker(ROUTING["breaker_failure_threshold"], ROUTING["breaker_reset_seconds"])
+            _breakers[model_name] = breaker
+        return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    """Current circuit state of every model in config.MODELS."""
+    return {model_name: get_breaker(model_name).state for model_name in MODELS}
+
+
+def candidate_models(model_name: str, mode: str) -> List[str]:
+    """Models a routed run may use, in preference order, starting with the selected one."""
+    if mode == "fallback":
+        order = ROUTING["fallback_order"]
+        later = order[order.index(model_name) + 1:] if model_name in order else order
+        return [model_name] + [m for m in later if m != model_name]
+    if mode == "race":
+        others = sorted(
+            (m for m in MODELS if m != model_name),
+            key=lambda m: (MODELS[m]["typical_latency_seconds"], MODELS[m]["cost_per_million_tokens"]["output"])
+        )
+        return [model_name] + others
+    return [model_name]
+
+
+class RoutedLLM(LLM):
+    """LLM that routes each call across several Cerebras models.
+
+    In "fallback" mode a call moves down the candidate list when a model
+    times out, is rate limited or has its circuit open. In "race" mode the
+    call goes to the first race_width available models at once and the
+    first answer wins. Member clients come from resources.get_llm, so they
+    are shared with ordinary single-model runs.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        api_key: str,
+        mode: str,
+        temperature: float = DEFAULT_TEMPERATURE,
+        base_url: str = CEREBRAS_BASE_URL,
+        stream: bool = False,
+    ):
+        # Interleaved chunks from racing models would garble the live answer
+        stream = stream and mode != "race"
+        super().__init__(model=model_name, api_key=api_key, base_url=base_url, temperature=temperature, stream=stream)
+        self.mode = mode
+        self.members = [
+            # Failing over beats retrying the same model, so members do not retry
+            get_llm(m, api_key, temperature, base_url, stream, timeout=ROUTING["call_timeout_seconds"], max_retries=0)
+            for m in candidate_models(model_name, mode)
+        ]
+        self.models_used: Counter = Counter()
+        self.failovers = 0
+
+    def _available(self, messages) -> List[LLM]:
+        prompt_tokens = estimate_tokens(messages)
+        members = [
+            llm for llm in self.members
+            if MODELS[llm.model]["context_window"] > prompt_tokens
+            and get_breaker(llm.model).allow()
+            and not (llm.limiter and llm.limiter.is_paused())
+        ]
+        # With every circuit open, trying the preferred model beats failing outright
+        return members or self.members[:1]
+
+    def _attempt(self, llm: LLM, messages, tools, callbacks, available_functions):
+        # The agent executor sets its stop words on the LLM it was given
+        llm.stop = self.stop
+        breaker = get_breaker(llm.model)
+        try:
+            result = llm.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+        except Exception as e:
+            if is_retryable(e):
+                breaker.record_failure()
+            raise
+        breaker.record_success()
+        self.models_used[llm.model] += 1
+        return result
+
+    def _fallback(self, members: List[LLM], messages, tools, callbacks, available_functions):
+        error: Optional[Exception] = None
+        for llm in members:
+            try:
+                return self._attempt(llm, messages, tools, callbacks, available_functions)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                error = e
+                self.failovers += 1
+        raise error
+
+    def _race(self, members: List[LLM], messages, tools, callbacks, available_functions):
+        futures = [
+            _race_pool.submit(
+                contextvars.copy_context().run,
+                self._attempt, llm, list(messages), tools, callbacks, available_functions
+            )
+            for llm in members[:ROUTING["race_width"]]
+        ]
+        error: Optional[BaseException] = None
+        for future in as_completed(futures, timeout=ROUTING["call_timeout_seconds"]):
+            error = future.exception()
+            if error is None:
+                return future.result()
+        raise error
+
+    def call(
+        self,
+        messages,
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+    ):
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        members = self._available(messages)
+        # Racing a call that may execute functions would run them more than once
+        if self.mode == "race" and not available_functions and len(members) > 1:
+            return self._race(members, messages, tools, callbacks, available_functions)
+        return self._fallback(members, messages, tools, callbacks, available_functions)
+
+
+def get_routed_llm(model_name: str, api_key: str, mode: str, stream: bool = False) -> LLM:
+    """Returns the LLM for a run: the shared client in "single" mode, otherwise a per-run RoutedLLM."""
+    if mode == "single":
+        return get_llm(model_name, api_key, stream=stream)
+    return RoutedLLM(model_name, api_key, mode, stream=stream)
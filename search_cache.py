@@ -0,0 +1,136 @@
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+from crewai_tools import SerperDevTool
+
+import http_pool
+import jobs
+from cassette import get_cassette
+from config import HTTP_POOL, SEARCH_CACHE, TOOLS
+from rate_limit import call_with_retries, get_limiter
+
+
+def normalize_query(query: str) -> str:
+    """Collapses case, whitespace and trailing punctuation so near-identical queries share a key."""
+    return " ".join(query.casefold().split()).strip(" ?!.,;:")
+
+
+class SearchCache:
+    """In-process TTL/LRU cache that coalesces concurrent identical lookups.
+
+    While a key is being fetched, other callers asking for the same key wait
+    for that fetch instead of issuing their own request.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Returns the cached value for key, calling fetch at most once per miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return copy.deepcopy(entry[1])
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = Future()
+                self._inflight[key] = pending
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            return copy.deepcopy(pending.result())
+
+        try:
+            value = fetch()
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        pending.set_result(value)
+        return copy.deepcopy(value)
+
+    def clear(self) -> None:
+        """Drops every cached result (in-flight fetches are unaffected)."""
+        with self._lock:
+            self._entries.clear()
+
+
+search_cache = SearchCache(SEARCH_CACHE["ttl_seconds"], SEARCH_CACHE["max_entries"])
+
+
+class CachedSerperDevTool(SerperDevTool):
+    """SerperDevTool that serves repeated queries from the shared search cache.
+
+    Cache misses go through the shared Serper rate limiter and are retried
+    on 429s and transient errors, over the shared keep-alive connection
+    pool. Inside a run with an evidence compressor the agent gets its
+    compact digest instead of the raw payload.
+    """
+
+    def _run(self, **kwargs: Any) -> Any:
+        query = kwargs.get("search_query") or kwargs.get("query") or ""
+        key = (
+            kwargs.get("search_type", self.search_type),
+            normalize_query(query),
+            self.n_results,
+            self.country,
+            self.location,
+            self.locale,
+        )
+        # A cancelled run stops waiting here; the search still completes and fills the cache.
+        # Cache hits are recorded too, so a replay does not depend on what was cached.
+        results = jobs.interruptible(get_cassette().through, "serper", {"key": key}, lambda: search_cache.get_or_fetch(
+            key, lambda: self._fetch_detached(**kwargs)
+        ))
+        compressor = getattr(jobs.current_job.get(), "evidence", None)
+        return compressor.compress(query, results) if compressor else results
+
+    def _fetch_detached(self, **kwargs: Any) -> Any:
+        # Other runs may be waiting on this search, so it runs outside the current job: cancelling
+        # the job neither stops its retries nor shuts down the connection it uses
+        token = jobs.current_job.set(None)
+        try:
+            return call_with_retries(get_limiter("serper"), lambda: super(CachedSerperDevTool, self)._run(**kwargs))
+        finally:
+            jobs.current_job.reset(token)
+
+    def _make_api_request(self, search_query: str, search_type: str) -> dict:
+        # The request SerperDevTool sends, but on a pooled connection instead of a new one per search
+        payload = {"q": search_query, "num": self.n_results}
+        for field, value in (("gl", self.country), ("location", self.location), ("hl", self.locale)):
+            if value:
+                payload[field] = value
+        response = http_pool.get_client().post(
+            self._get_search_url(search_type),
+            headers={"X-API-KEY": os.environ[TOOLS["serper"]["api_key_env"]], "content-type": "application/json"},
+            json=payload,
+            timeout=HTTP_POOL["serper_timeout_seconds"]
+        )
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            raise ValueError("Empty response from Serper API")
+        return results
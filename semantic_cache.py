@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from config import CACHE_DIR, RESULT_CACHE, SEMANTIC_CACHE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS goals (
+    key TEXT PRIMARY KEY,
+    scope TEXT NOT NULL,
+    model TEXT NOT NULL,
+    goal TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Function words only: words like "trends" or "risks" can be the whole difference between two goals
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it its of on or the to with about what how why which".split()
+)
+
+
+def _words(text: str) -> List[str]:
+    """Content words of a text in order, with plural "s" dropped."""
+    words = (w for w in _TOKEN.findall(text.casefold()) if w not in STOPWORDS)
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words]
+
+
+def key_terms(text: str) -> frozenset:
+    """Content words of a goal, names, numbers and years included, with plural "s" dropped."""
+    return frozenset(_words(text))
+
+
+def same_question(goal: str, earlier_goal: str, score: float) -> bool:
+    """Whether a report on earlier_goal answers goal as-is: same key terms, and similar as a whole."""
+    return score >= SEMANTIC_CACHE["threshold"] and key_terms(goal) == key_terms(earlier_goal)
+
+
+def _features(text: str) -> List[tuple]:
+    """(feature, weight) pairs: content words, word bigrams and character 4-grams of each word."""
+    words = _words(text)
+    features = [(f"w:{w}", 1.0) for w in words]
+    features += [(f"b:{a} {b}", 1.0) for a, b in zip(words, words[1:])]
+    # Character n-grams let inflections and compounds ("accelerator"/"accelerators") overlap
+    for word in words:
+        padded = f"<{word}>"
+        features += [(f"c:{padded[i:i + 4]}", 0.5) for i in range(max(len(padded) - 3, 1))]
+    return features
+
+
+def embed(text: str, dimensions: int) -> np.ndarray:
+    """Unit-length hashed n-gram vector of a text (the hashing trick, with signed buckets)."""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    features = _features(text)
+    if not features:
+        return vector
+    hashes = np.array([zlib.crc32(name.encode("utf-8")) for name, _ in features], dtype=np.uint64)
+    weights = np.array([weight for _, weight in features], dtype=np.float32)
+    signs = np.where(hashes & (1 << 31), -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, (hashes % dimensions).astype(np.intp), signs * weights)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def scope_key(task_type: str, output_format: str, tools: Iterable[str]) -> str:
+    """Groups goals whose reports are interchangeable apart from the model that wrote them."""
+    payload = json.dumps([task_type, output_format, sorted(set(tools))])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class SemanticIndex:
+    """Vectors of earlier research goals, searched by cosine similarity.
+
+    Goals are persisted in SQLite next to the result cache and re-embedded
+    into an in-memory NumPy matrix when the process starts; results
+    themselves stay in the result cache, keyed as before.
+    """
+
+    def __init__(self, path: str, dimensions: int, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            conn.execute("DELETE FROM goals WHERE created_at < ?", (time.time() - ttl_seconds,))
+            rows = conn.execute("SELECT key, scope, model, goal, created_at FROM goals ORDER BY created_at").fetchall()
+        self._entries: List[Dict] = []
+        self._matrix = np.zeros((max(len(rows), 64), dimensions), dtype=np.float32)
+        for row in rows[-max_entries:]:
+            self._append(dict(zip(("key", "scope", "model", "goal", "created_at"), row)))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _append(self, entry: Dict) -> None:
+        if len(self._entries) == len(self._matrix):
+            grown = np.zeros((len(self._matrix) * 2, self.dimensions), dtype=np.float32)
+            grown[:len(self._matrix)] = self._matrix
+            self._matrix = grown
+        self._matrix[len(self._entries)] = embed(entry["goal"], self.dimensions)
+        self._entries.append(entry)
+
+    def _drop(self, keys: set) -> None:
+        keep = [i for i, entry in enumerate(self._entries) if entry["key"] not in keys]
+        self._matrix[:len(keep)] = self._matrix[keep]
+        self._entries = [self._entries[i] for i in keep]
+
+    def add(self, key: str, scope: str, model: str, goal: str) -> None:
+        """Indexes the goal of a run whose result was stored under key in the result cache."""
+        entry = {"key": key, "scope": scope, "model": model, "goal": goal, "created_at": time.time()}
+        with self._lock:
+            self._drop({key})
+            self._append(entry)
+            evicted = {e["key"] for e in self._entries[:max(len(self._entries) - self.max_entries, 0)]}
+            if evicted:
+                self._drop(evicted)
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO goals VALUES (?, ?, ?, ?, ?)", tuple(entry.values()))
+            if evicted:
+                conn.executemany("DELETE FROM goals WHERE key = ?", [(k,) for k in evicted])
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._drop({key})
+        with self._connect() as conn:
+            conn.execute("DELETE FROM goals WHERE key = ?", (key,))
+
+    def search(self, goal: str, scope: str, min_score: float, limit: int = 5) -> List[Dict]:
+        """Entries in scope at least min_score similar to goal, best first, each with its "score"."""
+        query = embed(goal, self.dimensions)
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            if not self._entries:
+                return []
+            scores = self._matrix[:len(self._entries)] @ query
+            eligible = np.array([e["scope"] == scope and e["created_at"] >= cutoff for e in self._entries])
+            scores = np.where(eligible, scores, -1.0)
+            best = np.argsort(-scores)[:limit]
+            return [
+                {**self._entries[i], "score": float(scores[i])}
+                for i in best if scores[i] >= min_score
+            ]
+
+
+_lock = threading.Lock()
+_instance: Optional[SemanticIndex] = None
+
+
+def get_semantic_index() -> SemanticIndex:
+    """Returns the process-wide index configured in config.SEMANTIC_CACHE."""
+    global _instance
+    if _instance is None:
+        with _lock:
+            if _instance is None:
+                _instance = SemanticIndex(
+                    os.path.join(CACHE_DIR, "results.sqlite3"),
+                    dimensions=SEMANTIC_CACHE["dimensions"],
+                    max_entries=SEMANTIC_CACHE["max_entries"],
+                    ttl_seconds=RESULT_CACHE["ttl_seconds"]
+                )
+    return _instance
@@ -0,0 +1,122 @@
+import json
+import os
+
+from aiohttp import web
+
+import crews
+import http_pool
+import jobs
+import routing
+import warmup
+from config import MODELS, OUTPUT_FORMATS, ROUTING, TASK_TYPES, TOOLS
+
+
+def job_payload(job: jobs.Job) -> dict:
+    """Returns the JSON representation of a job."""
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "phase": job.phase,
+        "progress": round(job.progress, 3),
+        "queue_position": jobs.queue_position(job) if job.status == jobs.QUEUED else None,
+        "result": job.result,
+        "error": job.error,
+        "metadata": {k: v for k, v in job.metadata.items() if k != "results"}
+    }
+
+
+async def create_job(request: web.Request) -> web.Response:
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise web.HTTPBadRequest(reason="Request body must be JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(reason="Request body must be a JSON object")
+
+    task_type = body.get("task_type", "research")
+    goal = body.get("goal") or ""
+    model_name = body.get("model", next(iter(MODELS)))
+    output_format = body.get("output_format", next(iter(OUTPUT_FORMATS)))
+    tool_ids = body.get("tools", [tool_id for tool_id, tool in TOOLS.items() if tool["default"]])
+    routing_mode = body.get("routing", ROUTING["default_mode"])
+
+    if task_type not in TASK_TYPES or task_type in ("batch", "repo"):
+        raise web.HTTPBadRequest(reason=f"Unsupported task_type '{task_type}'")
+    if not isinstance(goal, str) or not goal.strip():
+        raise web.HTTPBadRequest(reason="'goal' is required and must be a string")
+    goal = goal.strip()
+    if model_name not in MODELS:
+        raise web.HTTPBadRequest(reason=f"Unknown model '{model_name}'")
+    if routing_mode not in ROUTING["modes"]:
+        raise web.HTTPBadRequest(reason=f"Unknown routing mode '{routing_mode}'")
+    if task_type != "code" and output_format not in OUTPUT_FORMATS:
+        raise web.HTTPBadRequest(reason=f"Unknown output_format '{output_format}'")
+    if not isinstance(tool_ids, list):
+        raise web.HTTPBadRequest(reason="'tools' must be a list")
+    unknown_tools = [tool_id for tool_id in tool_ids if tool_id not in TOOLS]
+    if unknown_tools:
+        raise web.HTTPBadRequest(reason=f"Unknown tools: {', '.join(unknown_tools)}")
+
+    try:
+        job = crews.submit_request(
+            task_type,
+            goal,
+            model_name,
+            output_format,
+            tool_ids,
+            request.app["api_key"],
+            use_cache=not body.get("bypass_cache", False),
+            routing=routing_mode,
+            owner=request.remote
+        )
+    except jobs.QueueFullError as e:
+        raise web.HTTPTooManyRequests(reason=str(e))
+    return web.json_response(job_payload(job), status=200 if job.done else 202)
+
+
+async def get_job(request: web.Request) -> web.Response:
+    job = jobs.get_job(request.match_info["job_id"])
+    if job is None:
+        raise web.HTTPNotFound(reason="Unknown or expired job")
+    return web.json_response(job_payload(job))
+
+
+async def cancel_job(request: web.Request) -> web.Response:
+    job = jobs.get_job(request.match_info["job_id"])
+    if job is None:
+        raise web.HTTPNotFound(reason="Unknown or expired job")
+    jobs.cancel(job)
+    return web.json_response(job_payload(job))
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+async def connection_stats(request: web.Request) -> web.Response:
+    return web.json_response(http_pool.stats())
+
+
+async def breaker_states(request: web.Request) -> web.Response:
+    return web.json_response(routing.breaker_states())
+
+
+def create_app(api_key: str) -> web.Application:
+    """Creates the HTTP API: POST /jobs queues a run, GET /jobs/{id} polls it, DELETE /jobs/{id} cancels it."""
+    app = web.Application()
+    app["api_key"] = api_key
+    app.add_routes([
+        web.post("/jobs", create_job),
+        web.get("/jobs/{job_id}", get_job),
+        web.delete("/jobs/{job_id}", cancel_job),
+        web.get("/health", health),
+        web.get("/metrics/connections", connection_stats),
+        web.get("/metrics/breakers", breaker_states),
+    ])
+    return app
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080) -> None:
+    """Runs the HTTP API until interrupted."""
+    warmup.warm_connections()
+    web.run_app(create_app(os.environ["CEREBRAS_API_KEY"]), host=host, port=port)
@@ -0,0 +1,25 @@
+from crewai.utilities.events import (
+    LLMCallStartedEvent,
+    LLMStreamChunkEvent,
+    crewai_event_bus,
+)
+
+import jobs
+
+# Handlers are registered once per process on import. LLM instances are
+# shared between sessions, so chunks are routed by the job running on the
+# emitting worker rather than by event source.
+
+
+@crewai_event_bus.on(LLMCallStartedEvent)
+def _on_llm_call_started(source, event: LLMCallStartedEvent) -> None:
+    job = jobs.current_job.get()
+    if job is not None:
+        job.start_stream()
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _on_llm_stream_chunk(source, event: LLMStreamChunkEvent) -> None:
+    job = jobs.current_job.get()
+    if job is not None and event.chunk:
+        job.append_chunk(event.chunk)
@@ -0,0 +1,136 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+httpx = pytest.importorskip("httpx")
+
+import http_pool
+import jobs
+from config import HTTP_POOL, TOOLS
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        # /<seconds>: answers after a delay, like a slow completion
+        time.sleep(float(self.path.strip("/") or 0))
+        try:
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fresh_pool(monkeypatch):
+    monkeypatch.setattr(http_pool, "_client", None)
+    monkeypatch.setattr(http_pool, "_stats", {})
+    monkeypatch.setattr(http_pool, "_idle", [])
+    yield
+    if http_pool._client is not None:
+        http_pool._client.close()
+
+
+def test_warm_reuses_one_connection(server, fresh_pool):
+    timings = http_pool.warm([f"{server}/models"] * 3)
+    assert timings[f"{server}/models"] is not None
+    stats = http_pool.stats()["127.0.0.1"]
+    assert stats["requests"] == 3
+    assert stats["new_connections"] == 1
+    assert stats["reused"] == 2
+
+
+def test_warm_reports_unreachable_endpoints(fresh_pool):
+    # Port 9 (discard) is closed on test machines, so connecting fails fast
+    assert http_pool.warm(["http://127.0.0.1:9/"]) == {"http://127.0.0.1:9/": None}
+
+
+def _get_in_job(url):
+    """Queues a run that fetches url; its metadata["call_ended"] is set once the request itself returns or fails."""
+    def run(job):
+        def call():
+            try:
+                return http_pool.get_client().get(url)
+            finally:
+                job.metadata["call_ended"] = time.perf_counter()
+        jobs.interruptible(call)
+        return "done"
+    return jobs.submit(run, budget={"max_seconds": 60})
+
+
+def test_cancel_cuts_off_a_request_waiting_for_its_response(server, fresh_pool):
+    slow, other = _get_in_job(f"{server}/5"), _get_in_job(f"{server}/1")
+    time.sleep(0.5)
+    cancelled_at = time.perf_counter()
+    jobs.cancel(slow)
+    assert slow.wait(5) and other.wait(5)
+    assert slow.status == jobs.CANCELLED
+    # The request itself was aborted, not just abandoned to finish in the background
+    assert slow.metadata["call_ended"] - cancelled_at < 1
+    # The other run's request, on its own connection, is unaffected
+    assert other.status == jobs.DONE
+
+
+def test_finished_runs_hand_their_connections_on(server, fresh_pool):
+    for _ in range(3):
+        job = _get_in_job(f"{server}/0")
+        assert job.wait(5) and job.status == jobs.DONE
+    assert http_pool.stats()["127.0.0.1"]["new_connections"] == 1
+
+
+def test_serper_requests_use_the_shared_client(monkeypatch):
+    pytest.importorskip("crewai_tools")
+    import search_cache
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return httpx.Response(200, json={"organic": [{"title": "Result"}]})
+
+    monkeypatch.setenv(TOOLS["serper"]["api_key_env"], "test-key")
+    monkeypatch.setattr(http_pool, "_client", httpx.Client(transport=httpx.MockTransport(handler)))
+    tool = search_cache.CachedSerperDevTool(n_results=3, country="us")
+
+    assert tool._make_api_request("crew ai", "search") == {"organic": [{"title": "Result"}]}
+    request = sent[0]
+    assert request.url.path == "/search"
+    assert request.headers["X-API-KEY"] == "test-key"
+    assert json.loads(request.content) == {"q": "crew ai", "num": 3, "gl": "us"}
+    assert request.extensions["timeout"]["read"] == HTTP_POOL["serper_timeout_seconds"]
+
+
+def test_serper_empty_response_is_an_error(monkeypatch):
+    pytest.importorskip("crewai_tools")
+    import search_cache
+    monkeypatch.setenv(TOOLS["serper"]["api_key_env"], "test-key")
+    monkeypatch.setattr(http_pool, "_client", httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={}))))
+    with pytest.raises(ValueError):
+        search_cache.CachedSerperDevTool()._make_api_request("crew ai", "search")
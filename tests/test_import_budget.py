@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import import_budget
+
+# Wall-clock timings are unreliable on a loaded CI runner, so the check only runs when asked for,
+# e.g. CREW_IMPORT_BUDGET=2.0 python -m pytest tests/test_import_budget.py
+BUDGET = os.getenv("CREW_IMPORT_BUDGET")
+
+
+@pytest.mark.skipif(not BUDGET, reason="set CREW_IMPORT_BUDGET (seconds) to run the import-time benchmark")
+def test_startup_imports_stay_within_budget():
+    # The probe imports the app's real dependencies in a fresh interpreter
+    for module in ("streamlit", "dotenv", "markdown"):
+        pytest.importorskip(module)
+    # The fastest of several fresh interpreters counts, which filters out most scheduling noise
+    assert import_budget.main(["--budget", BUDGET, "--repeats", "5"]) == 0
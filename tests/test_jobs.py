@@ -0,0 +1,36 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jobs
+from config import WORKER_POOL
+
+
+def test_owners_interleave_under_contention(monkeypatch):
+    monkeypatch.setitem(WORKER_POOL, "max_workers", 2)
+    started, release = [], {}
+
+    def run(job, name):
+        started.append(name)
+        release[name].wait(5)
+        return name
+
+    submitted = {}
+    for owner, names in (("a", ["a1", "a2", "a3"]), ("b", ["b1", "b2"])):
+        for name in names:
+            release[name] = threading.Event()
+            submitted[name] = jobs.submit(run, name, owner=owner)
+    # a1 and a2 took both workers; b, with nothing running, goes next
+    assert jobs.queue_position(submitted["b1"]) == 1
+
+    for done, name in enumerate(("a1", "a2", "b1", "a3", "b2"), start=1):
+        release[name].set()
+        submitted[name].wait(5)
+        # Let the freed worker pick its next job before another one finishes
+        deadline = time.time() + 5
+        while len(started) < min(done + 2, 5) and time.time() < deadline:
+            time.sleep(0.01)
+    assert started == ["a1", "a2", "b1", "a3", "b2"]
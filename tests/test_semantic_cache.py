@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+
+from config import SEMANTIC_CACHE
+from semantic_cache import SemanticIndex, same_question, scope_key
+
+SCOPE = scope_key("research", "Markdown", ["serper"])
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SemanticIndex(str(tmp_path / "results.sqlite3"), SEMANTIC_CACHE["dimensions"], 100, 3600)
+
+
+def _best(index, goal):
+    matches = index.search(goal, SCOPE, SEMANTIC_CACHE["seed_threshold"])
+    return matches[0] if matches else None
+
+
+@pytest.mark.parametrize("earlier, goal", [
+    ("AI chip trends", "trends in AI chips"),
+    ("trend of AI chip", "trends of AI chips"),
+    ("AI chip market trends 2025", "AI chip market trend 2025"),
+    ("What are the latest AI chip trends?", "latest trends in AI chips"),
+])
+def test_rephrasings_are_served(index, earlier, goal):
+    index.add("earlier", SCOPE, "model", earlier)
+    match = _best(index, goal)
+    assert match is not None
+    assert same_question(goal, match["goal"], match["score"])
+
+
+@pytest.mark.parametrize("earlier, goal", [
+    ("AI chip market trends 2025", "AI chip market trends 2026"),
+    ("EV adoption in California", "EV adoption in Texas"),
+    ("risks of AI in healthcare", "benefits of AI in healthcare"),
+])
+def test_different_questions_are_not_served(index, earlier, goal):
+    index.add("earlier", SCOPE, "model", earlier)
+    match = _best(index, goal)
+    assert match is None or not same_question(goal, match["goal"], match["score"])
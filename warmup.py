@@ -0,0 +1,62 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Optional
+
+# Modules that pull in CrewAI, LiteLLM and the tool packages. streaming and
+# instrumentation register event-bus handlers on import, so they have to be
+# loaded before the first run starts.
+HEAVY_MODULES = ("crews", "streaming")
+
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+
+
+def _import_all() -> ModuleType:
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    return importlib.import_module("crews")
+
+
+def _warm() -> None:
+    try:
+        _import_all()
+    except Exception:
+        # Surfaced by load() when a run is actually requested
+        pass
+
+
+def start_background() -> None:
+    """Starts importing the heavy modules on a daemon thread, once per process."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_warm, name="crew-warmup", daemon=True)
+            _thread.start()
+
+
+def _warm_connections() -> None:
+    try:
+        import http_pool
+        from cassette import get_cassette
+
+        # A replayed run never touches the network
+        if not get_cassette().replaying:
+            http_pool.warm()
+    except Exception:
+        # The first real call opens its connection instead
+        pass
+
+
+def warm_connections() -> None:
+    """Opens keep-alive connections to the Cerebras and Serper endpoints on a daemon thread."""
+    threading.Thread(target=_warm_connections, name="connection-warmup", daemon=True).start()
+
+
+def load() -> ModuleType:
+    """Returns the crews module, importing (or waiting for the warm-up to import) it first.
+
+    Python's per-module import locks make this safe to call while the
+    background warm-up is still running; it simply waits for it.
+    """
+    return _import_all()